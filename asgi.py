@@ -0,0 +1,15 @@
+"""
+Punto de entrada ASGI (uvicorn, hypercorn...).
+
+    uvicorn asgi:app --workers 4 --host 0.0.0.0 --port 8000
+
+La aplicación es WSGI: cada solicitud se ejecuta en el pool de hilos de
+asgiref, así que no es más rápida que gunicorn (wsgi.py), solo permite
+usar un servidor ASGI existente. uvicorn no comparte la aplicación entre
+workers (sin preload) y reinicia con SIGTERM esperando las solicitudes.
+"""
+from asgiref.wsgi import WsgiToAsgi
+from wsgi import app as wsgi_app
+
+
+app = WsgiToAsgi(wsgi_app)
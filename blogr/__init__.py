@@ -1,26 +1,100 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_ckeditor import CKEditor
+from werkzeug.middleware.proxy_fix import ProxyFix
+from blogr.database import RoutingSession
+from config import get_config
 
 
 # ? Creamos instancia de la clase SQLAlchemy()
-db = SQLAlchemy()
+# ? Los SELECT de las vistas @read_replica se envían a las réplicas (blogr/database.py).
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 # @audit def create_app
-def create_app():
+def create_app(config=None):
+    """
+    Crea la aplicación.
+
+    Args:
+        config (string): Entorno ('development', 'testing', 'production'),
+        por defecto la variable de entorno BLOGR_ENV (config.get_config).
+    """
     # Creamos Aplicación Flask.
     app = Flask(__name__)
 
-    # Agregamos archivo config.py
-    app.config.from_object('config.Config')
+    # Agregamos archivo config.py, la clase según el entorno.
+    app.config.from_object(get_config(config))
+
+    if not app.config['SECRET_KEY']:
+        raise RuntimeError('Falta la variable de entorno SECRET_KEY.')
+
+    app.json.sort_keys = app.config['JSON_SORT_KEYS']
+
+    # Detrás de nginx la IP del cliente viene en X-Forwarded-For (límite de login, /metrics).
+    if app.config['TRUSTED_PROXIES']:
+        proxies = app.config['TRUSTED_PROXIES']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+
+    # Configuramos la caché de bytecode de las plantillas.
+    from blogr import templating
+    templating.init_app(app)
+
+    # Configuramos las métricas (/metrics).
+    from blogr import metrics
+    metrics.init_app(app)
+
+    # Configuramos el pool de conexiones y las réplicas (config.Config).
+    from blogr import database
+    database.configure(app)
 
     # Inicializamos la base de datos y mandamos app.
     db.init_app(app)
+    database.init_app(app, db)
     
     # Configuramos CKEditor
     ckeditor = CKEditor(app)
 
+    # Cargamos CKEditor solo en las páginas del editor.
+    from blogr import editor
+    editor.init_app(app)
+
+    # Configuramos los archivos estáticos compilados (flask assets build).
+    from blogr import assets
+    assets.init_app(app)
+
+    # Configuramos el envío de los archivos estáticos (caché, X-Accel-Redirect).
+    from blogr import serving
+    serving.init_app(app)
+
+    # Configuramos la caché de páginas de los posts.
+    from blogr import cache
+    cache.init_app(app)
+
+    # Registramos avatar_url() para las fotos de perfil.
+    from blogr import images
+    images.init_app(app)
+
+    # Configuramos el almacén de archivos subidos.
+    from blogr import media
+    media.init_app(app)
+
+    # Configuramos el límite de intentos de inicio de sesión.
+    from blogr import ratelimit
+    ratelimit.init_app(app)
+
+    # Configuramos el pool de hash de contraseñas.
+    from blogr import passwords
+    passwords.init_app(app)
+
+    # Configuramos los trabajos en segundo plano.
+    from blogr import jobs
+    jobs.init_app(app)
+
+    # Configuramos el procesamiento del contenido de los posts.
+    from blogr import content
+    content.init_app(app)
+
     # Registramos las Vistas de home.py
     from blogr import home
     app.register_blueprint(home.bp)
@@ -34,10 +108,18 @@ def create_app():
     app.register_blueprint(post.bp)
 
     # Importamos todo los Modulos creados.
-    from .models import User, Post
+    from .models import User, Post, Job, Media, RateLimit
+
+    # Configuramos el motor de búsqueda de posts.
+    from blogr import search
+    search.init_app(app)
+
+    # El esquema se crea con `flask db upgrade` (migrations/), al iniciar no se ejecuta DDL.
+    from blogr import migrate
+    migrate.init_app(app)
 
-    # Migramos los Modelos creados de manera automática.
-    with app.app_context():
-        db.create_all()
+    # Compilamos las plantillas antes de la primera solicitud (TEMPLATES_PRELOAD).
+    if app.config['TEMPLATES_PRELOAD']:
+        templating.compile_templates(app)
 
     return app
@@ -0,0 +1,492 @@
+"""
+Compilación de archivos estáticos (`flask assets build`).
+
+Genera en static/dist/ una copia de cada archivo de static/ (excepto
+media/, que ya se direcciona por contenido) con:
+    - el hash del contenido en el nombre (css/style.3f2a9c1b.css),
+    - bootstrap.min.css sin las reglas que no usan las plantillas,
+    - las imágenes reducidas al tamaño máximo en que se muestran,
+    - versiones precomprimidas .gz y .br (si está instalado brotli).
+
+El manifiesto static/dist/manifest.json relaciona cada archivo con su
+versión compilada; url_for('static', ...) lo utiliza automáticamente
+y la vista static (blogr/serving.py) envía la versión comprimida que
+acepte el navegador.
+
+Los archivos de las compilaciones anteriores no se eliminan al compilar:
+las páginas en caché (o validadas con 304) siguen apuntando a ellos. Se
+conservan las últimas ASSETS_KEEP_BUILDS compilaciones (historial en
+static/dist/builds.json) y se eliminan los archivos que ninguna usa. El
+hash del manifiesto (asset_version) forma parte de la llave de la caché
+de páginas y del ETag.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import click
+from flask import (
+    current_app,
+    request
+)
+from flask.cli import AppGroup
+from werkzeug.security import safe_join
+from PIL import Image
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+# Manifiestos de las compilaciones anteriores, del más reciente al más antiguo.
+BUILDS = 'builds.json'
+
+# Carpetas de static que no se compilan.
+SKIP_DIRS = {DIST, 'media'}
+
+# Tipos que se precomprimen (las imágenes ya están comprimidas).
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html'}
+
+# Codificaciones en orden de preferencia: (Accept-Encoding, extensión).
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+# * Eliminación de reglas CSS que no se usan.
+def _find(css, chars, start):
+    """
+    Busca el primer carácter de `chars` fuera de cadenas y comentarios.
+    """
+    i = start
+    quote = None
+
+    while i < len(css):
+        char = css[i]
+
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif css.startswith('/*', i):
+            i = css.find('*/', i + 2)
+            i = len(css) if i == -1 else i + 1
+        elif char in chars:
+            return i
+
+        i += 1
+
+    return -1
+
+
+def _matching_brace(css, start):
+    """
+    Posición de la llave que cierra la abierta en `start`.
+    """
+    depth = 0
+    i = start
+
+    while True:
+        i = _find(css, '{}', i)
+
+        if i == -1:
+            return len(css)
+
+        depth += 1 if css[i] == '{' else -1
+
+        if depth == 0:
+            return i
+
+        i += 1
+
+
+def parse_css(css):
+    """
+    Function que separa una hoja de estilos en reglas.
+
+    Returns:
+        list: Tuplas (prelude, body), body es None en reglas como @charset.
+    """
+    rules = []
+    i = 0
+
+    while i < len(css):
+        j = _find(css, '{;', i)
+
+        if j == -1:
+            break
+
+        prelude = re.sub(r'/\*.*?\*/', '', css[i:j], flags=re.S).strip()
+
+        if css[j] == ';':
+            rules.append((prelude, None))
+            i = j + 1
+            continue
+
+        end = _matching_brace(css, j)
+        rules.append((prelude, css[j + 1:end]))
+        i = end + 1
+
+    return rules
+
+
+def _split_selectors(prelude):
+    selectors = []
+    depth = 0
+    current = ''
+
+    for char in prelude:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+
+        if char == ',' and depth == 0:
+            selectors.append(current)
+            current = ''
+        else:
+            current += char
+
+    return selectors + [current]
+
+
+def _selector_used(selector, used):
+    # Las clases dentro de :not(...) no tienen que existir en las plantillas.
+    selector = re.sub(r':not\([^)]*\)', '', selector)
+    classes = re.findall(r'\.(-?[_a-zA-Z][\w-]*)', selector)
+
+    return all(name in used for name in classes)
+
+
+def purge_css(css, used):
+    """
+    Function que elimina los selectores con clases que no se usan.
+
+    Args:
+        css (string): Hoja de estilos.
+        used (set): Clases usadas en las plantillas (y la lista segura).
+
+    Returns:
+        string: Hoja de estilos reducida (sin comentarios).
+    """
+    output = []
+
+    for prelude, body in parse_css(css):
+        if body is None:
+            output.append(f'{prelude};')
+
+        elif prelude.startswith(('@media', '@supports', '@layer', '@container')):
+            inner = purge_css(body, used)
+
+            if inner:
+                output.append(f'{prelude}{{{inner}}}')
+
+        elif prelude.startswith('@'):
+            # @font-face, @keyframes, @page...
+            output.append(f'{prelude}{{{body}}}')
+
+        else:
+            selectors = [s for s in _split_selectors(prelude) if _selector_used(s, used)]
+
+            if selectors:
+                output.append(f'{",".join(selectors)}{{{body}}}')
+
+    return ''.join(output)
+
+
+def template_classes(app):
+    """
+    Function que obtiene las palabras usadas en las plantillas,
+    incluye las clases escritas dentro de bloques de Jinja.
+
+    Returns:
+        set: Posibles nombres de clases.
+    """
+    used = set(app.config['ASSETS_CSS_SAFELIST'])
+
+    for name in app.jinja_env.list_templates():
+        source = app.jinja_env.loader.get_source(app.jinja_env, name)[0]
+        used.update(re.findall(r'[A-Za-z][\w-]*', source))
+
+    return used
+
+
+# * Compilación.
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def resize_image(path, width):
+    """
+    Function que reduce una imagen al ancho indicado
+    conservando su formato.
+
+    Returns:
+        bytes: Imagen reducida o None si ya era más pequeña.
+    """
+    with Image.open(path) as image:
+        if image.width <= width:
+            return None
+
+        height = round(image.height * width / image.width)
+        format = image.format
+        image = image.resize((width, height), Image.LANCZOS)
+
+        output = io.BytesIO()
+        image.save(output, format, optimize=True, **({'quality': 85} if format == 'JPEG' else {}))
+
+        return output.getvalue()
+
+
+def build(app):
+    """
+    Function que compila los archivos de static en static/dist.
+
+    Returns:
+        dict: Manifiesto {archivo: archivo compilado}.
+    """
+    static = app.static_folder
+    dist = os.path.join(static, DIST)
+    purge = set(app.config['ASSETS_CSS_PURGE'])
+    widths = app.config['ASSETS_IMAGE_WIDTHS']
+    used = template_classes(app) if purge else set()
+
+    manifest = {}
+
+    for root, dirs, files in os.walk(static):
+        dirs[:] = sorted(d for d in dirs if os.path.relpath(os.path.join(root, d), static) not in SKIP_DIRS)
+
+        for file in sorted(files):
+            path = os.path.join(root, file)
+            filename = os.path.relpath(path, static).replace(os.sep, '/')
+
+            if file.startswith('.'):
+                continue
+
+            data = None
+
+            if filename in purge:
+                with open(path, encoding='utf-8') as source:
+                    data = purge_css(source.read(), used).encode()
+
+            elif filename in widths:
+                data = resize_image(path, widths[filename])
+
+            if data is None:
+                with open(path, 'rb') as source:
+                    data = source.read()
+
+            name, extension = os.path.splitext(filename)
+            target = f'{DIST}/{name}.{fingerprint(data)}{extension}'
+            manifest[filename] = target
+
+            write(os.path.join(static, target), data)
+
+            if extension.lower() in COMPRESSIBLE:
+                write(os.path.join(static, target + '.gz'), gzip.compress(data, 9, mtime=0))
+
+                if brotli is not None:
+                    write(os.path.join(static, target + '.br'), brotli.compress(data))
+
+    write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    builds = [manifest] + [entry for entry in load_builds(static) if entry != manifest]
+    prune(static, builds[:app.config['ASSETS_KEEP_BUILDS']])
+
+    return manifest
+
+
+def load_builds(static):
+    """
+    Function que lee el historial de compilaciones.
+
+    Returns:
+        list: Manifiestos, del más reciente al más antiguo.
+    """
+    path = os.path.join(static, DIST, BUILDS)
+
+    if not os.path.isfile(path):
+        return []
+
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def prune(static, builds):
+    """
+    Function que guarda el historial `builds` y elimina de static/dist
+    los archivos que no pertenecen a ninguna de esas compilaciones.
+
+    Returns:
+        int: Archivos eliminados.
+    """
+    dist = os.path.join(static, DIST)
+    keep = {MANIFEST, BUILDS}
+
+    for manifest in builds:
+        for target in manifest.values():
+            target = os.path.relpath(target, DIST)
+            keep.update((target, target + '.gz', target + '.br'))
+
+    removed = 0
+
+    for root, dirs, files in os.walk(dist):
+        for file in files:
+            path = os.path.join(root, file)
+
+            if os.path.relpath(path, dist).replace(os.sep, '/') not in keep:
+                os.remove(path)
+                removed += 1
+
+    write(os.path.join(dist, BUILDS), json.dumps(builds, indent=2, sort_keys=True).encode())
+
+    return removed
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, 'wb') as file:
+        file.write(data)
+
+
+def load_manifest(app):
+    """
+    Function que lee el manifiesto de static/dist si existe.
+
+    Returns:
+        dict: Manifiesto {archivo: archivo compilado}.
+    """
+    path = os.path.join(app.static_folder, DIST, MANIFEST)
+
+    if not app.config['ASSETS_USE_MANIFEST'] or not os.path.isfile(path):
+        return {}
+
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def manifest_version(manifest):
+    """
+    Function que obtiene el hash del manifiesto.
+
+    Returns:
+        string: Versión de los archivos compilados ('' sin manifiesto).
+    """
+    if not manifest:
+        return ''
+
+    return fingerprint(json.dumps(manifest, sort_keys=True).encode())
+
+
+# * Integración con Flask.
+def asset_version():
+    """ Versión de los archivos estáticos que usan las páginas. """
+    return current_app.extensions['assets_version']
+
+
+def fingerprint_url(endpoint, values):
+    """
+    url_for('static', filename='css/style.css') -> /static/dist/css/style.<hash>.css
+    """
+    if endpoint == 'static':
+        manifest = current_app.extensions['assets']
+        filename = values.get('filename')
+
+        if filename in manifest:
+            values['filename'] = manifest[filename]
+
+
+def has_precompressed(filename):
+    """
+    Indica si el archivo compilado tiene versiones .gz o .br: la
+    respuesta depende de Accept-Encoding aunque se envíe sin comprimir.
+    """
+    if not filename.startswith(f'{DIST}/'):
+        return False
+
+    for encoding, suffix in ENCODINGS:
+        path = safe_join(current_app.static_folder, filename + suffix)
+
+        if path and os.path.isfile(path):
+            return True
+
+    return False
+
+
+def precompressed(filename):
+    """
+    Function que busca la versión precomprimida (.br/.gz) de un
+    archivo compilado que acepte el navegador.
+
+    Args:
+        filename (string): Archivo dentro de static.
+
+    Returns:
+        tuple: (archivo precomprimido, codificación) o (None, None).
+    """
+    if filename.startswith(f'{DIST}/'):
+        for encoding, suffix in ENCODINGS:
+            path = safe_join(current_app.static_folder, filename + suffix)
+
+            if request.accept_encodings[encoding] and path and os.path.isfile(path):
+                return filename + suffix, encoding
+
+    return None, None
+
+
+# @audit CLI flask assets
+cli = AppGroup('assets', help='Compilación de archivos estáticos.')
+
+
+@cli.command('build')
+def build_command():
+    """ Compila los archivos de static en static/dist. """
+    manifest = build(current_app)
+    current_app.extensions['assets'] = manifest
+    current_app.extensions['assets_version'] = manifest_version(manifest)
+
+    before = after = 0
+
+    for filename, target in manifest.items():
+        before += os.path.getsize(os.path.join(current_app.static_folder, filename))
+        after += os.path.getsize(os.path.join(current_app.static_folder, target))
+
+    click.echo(f'{len(manifest)} archivos compilados: {before / 1024:.0f} KB -> {after / 1024:.0f} KB.')
+
+    if brotli is None:
+        click.echo('brotli no está instalado, solo se generaron versiones .gz.')
+
+
+@cli.command('clean')
+@click.option('--keep', type=int, help='Compilaciones a conservar (por defecto ASSETS_KEEP_BUILDS).')
+def clean_command(keep):
+    """
+    Elimina los archivos de las compilaciones anteriores a las últimas `keep`.
+    """
+    keep = current_app.config['ASSETS_KEEP_BUILDS'] if keep is None else keep
+    static = current_app.static_folder
+
+    if not os.path.isdir(os.path.join(static, DIST)):
+        click.echo('static/dist no existe.')
+        return
+
+    removed = prune(static, load_builds(static)[:max(keep, 1)])
+    click.echo(f'{removed} archivos eliminados.')
+
+
+def init_app(app):
+    """
+    Carga el manifiesto, registra url_for con hash y el CLI.
+    La vista static (blogr/serving.py) envía los archivos precomprimidos.
+    """
+    app.extensions['assets'] = load_manifest(app)
+    app.extensions['assets_version'] = manifest_version(app.extensions['assets'])
+    app.url_defaults(fingerprint_url)
+    app.cli.add_command(cli)
@@ -1,4 +1,8 @@
 import functools
+import math
+import os
+from datetime import datetime
+from collections import namedtuple
 from flask import (
     Blueprint,
     render_template,
@@ -7,22 +11,50 @@ from flask import (
     redirect,
     flash,
     session,
-    g
+    g,
+    current_app
 )
-from werkzeug.security import (
-    generate_password_hash,
-    check_password_hash
+from .models import (
+    User,
+    Post,
+    Job
+)
+from .cache import (
+    MemoryCache,
+    invalidate_pages
 )
-from .models import User
 from blogr import db
-# Elimina espacios de una imagen y agrega barra baja.
-from werkzeug.utils import secure_filename
+from .images import (
+    InvalidImage,
+    check_image
+)
+from .media import (
+    release,
+    store_avatar
+)
+from .metrics import incr
+from .upsert import insert_unique
+from .ratelimit import check_login
+from .passwords import (
+    PasswordBusy,
+    hash_password,
+    verify_password
+)
+from .jobs import (
+    enqueue,
+    handler,
+    has_pending,
+    save_upload
+)
 from sqlalchemy.exc import SQLAlchemyError
 
 
 # Creamos Blueprint /auth
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+# Mensaje cuando el pool de contraseñas está saturado (503).
+BUSY_MESSAGE = 'El servidor está ocupado, inténtalo de nuevo en unos segundos.'
+
 
 # @audit Route /register
 @bp.route('/register', methods=['GET', 'POST'])
@@ -40,26 +72,28 @@ def register():
         email = request.form.get('email')
         password = request.form.get('password')
 
-        # Registramos el usuario.
-        user = User(username, email, generate_password_hash(password))
-
-        # Validamos que correo no existan en la base de datos.
-        user_email = User.query.filter_by(email=email).first()
+        try:
+            # El hash se calcula en el pool de contraseñas.
+            user = User(username, email, hash_password(password))
+        except PasswordBusy:
+            flash(BUSY_MESSAGE)
+            return render_template('auth/register.html'), 503
 
         error = None
 
-        if user_email is None:
-            try:
-                db.session.add(user)
-                db.session.commit()
+        try:
+            # Registramos el usuario solo si el correo no existe (restricción única).
+            user.id = insert_unique(user)
+            db.session.commit()
 
-            except SQLAlchemyError as e:
-                error = f'Error interno al registrar el usuario "{username}". Mensaje: {str(e)}.'
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            error = f'Error interno al registrar el usuario "{username}". Mensaje: {str(e)}.'
 
-            else:
+        else:
+            if user.id is not None:
                 return redirect(url_for('auth.login'))
 
-        else:
             error = f"El correo {email} ya se encuentra registrado."
 
         flash(error)
@@ -82,13 +116,39 @@ def login():
         email = request.form.get('email')
         password = request.form.get('password')
 
+        # Límite de intentos por IP y por correo, antes de la consulta y del hash.
+        reason, wait = check_login(request.remote_addr, email)
+
+        if reason is not None:
+            incr('blogr_login_rejected_total', reason=reason)
+            flash(f'Demasiados intentos de inicio de sesión. Inténtalo de nuevo en {math.ceil(wait)} segundos.')
+            return render_template('auth/login.html'), 429, {'Retry-After': str(math.ceil(wait))}
+
         user = User.query.filter_by(email=email).first()
 
         error = None
 
-        if user is None or not check_password_hash(user.password, password):
+        try:
+            valid, rehash = verify_password(user.password, password) if user else (False, None)
+        except PasswordBusy:
+            incr('blogr_login_rejected_total', reason='busy')
+            flash(BUSY_MESSAGE)
+            return render_template('auth/login.html'), 503
+
+        incr('blogr_login_attempts_total', result='success' if valid else 'failure')
+
+        if not valid:
             error = "El correo y/o contraseña ingresados son incorrectos."
         else:
+            if rehash is not None:
+                # Cambiaron los parámetros del hash (config), guardamos el nuevo.
+                user.password = rehash
+
+                try:
+                    db.session.commit()
+                except SQLAlchemyError:
+                    db.session.rollback()
+
             if error is None:
                 session.clear()
                 session['user_id'] = user.id
@@ -99,31 +159,97 @@ def login():
     return render_template('auth/login.html')
 
 
+# Datos mínimos del usuario activo que se guardan en caché (g.user).
+Principal = namedtuple('Principal', ['id', 'username', 'photo'])
+
+
+@bp.record_once
+def init_user_cache(state):
+    """
+    Crea la caché de usuarios activos al registrar el Blueprint.
+    """
+    state.app.extensions['user_cache'] = MemoryCache(
+        maxsize=state.app.config['USER_CACHE_SIZE'],
+        ttl=state.app.config['USER_CACHE_TTL']
+    )
+
+
+def get_principal(user_id):
+    """
+    Function que obtiene los datos mínimos del usuario,
+    primero de la caché y si no existen de la base de datos.
+
+    Args:
+        user_id (int): id del usuario en la session.
+
+    Returns:
+        Principal: id, username y photo del usuario o None si no existe.
+    """
+    cache = current_app.extensions['user_cache']
+    principal = cache.get(user_id)
+
+    if principal is None:
+        user = db.session.get(User, user_id)
+
+        if user is None:
+            return None
+
+        principal = Principal(user.id, user.username, user.photo)
+        cache.set(user_id, principal)
+
+    return principal
+
+
+def forget_user(user_id):
+    """
+    Elimina al usuario de la caché, se llama
+    cuando cambian sus datos en (auth.profile).
+    """
+    current_app.extensions['user_cache'].delete(user_id)
+
+
 # @audit Function load_logged_in_user()
 @bp.before_app_request
 def load_logged_in_user():
     """ 
     Mantiene la session del usuario activa.
     Se ejecuta antes de cada solicitud entrante a la aplicación 
-    (antes de que se maneje una vista).
+    (antes de que se maneje una vista), excepto los archivos estáticos.
 
     Returns:
-        g.user: Alamcena todos los datos del usuario 
+        g.user: Alamcena los datos del usuario (id, username, photo)
         activo en la session.
     """
+    g.user = None
+
+    # Los archivos estáticos no necesitan al usuario. Revisamos antes de leer
+    # la session: leerla agrega "Vary: Cookie" y las cachés compartidas
+    # guardarían una copia por cookie.
+    if is_static_request():
+        return
+
     user_id = session.get('user_id')
 
-    if user_id is None:
-        g.user = None
-    else:
+    if user_id is not None:
         try:
-            g.user = User.query.get(user_id)
+            g.user = get_principal(user_id)
 
         except SQLAlchemyError as e:
+            g.user = None
             print(
                 f'No existe usuario registrado con id "{user_id}". Mensaje: {str(e)}.')
 
 
+def is_static_request():
+    """
+    Indica si la solicitud es para un archivo estático
+    (static de la aplicación o de un Blueprint, ej. ckeditor.static).
+    """
+    endpoint = request.endpoint or ''
+
+    return endpoint == 'static' or endpoint.endswith('.static')
+
+
 # @audit Route /logout
 @bp.route('/logout')
 def logout():
@@ -197,27 +323,40 @@ def profile(id):
 
         error = None
 
-        if password:
-            user.password = generate_password_hash(password)
-        elif len(password) > 0 and len(password) < 6:
+        if password and len(password) < 6:
             error = "La contraseña debe tener más de 5 caracteres."
+        elif password:
+            try:
+                user.password = hash_password(password)
+            except PasswordBusy:
+                db.session.rollback()
+                flash(BUSY_MESSAGE)
+                return render_template(
+                    'auth/profile.html',
+                    user=user,
+                    photo_pending=has_pending('avatar', user.id)
+                ), 503
+
+        photo_job = None
 
         if request.files['photo']:
             try:
                 # Obtenemos la imagen del formulario.
                 photo = request.files['photo']
-                # Como se va a guardar la imagen.
-                photo.save(f'blogr/static/media/{secure_filename(photo.filename)}')
-                # Guardamos en el campo "photo" la imagen en la Base de Datos.
-                user.photo = f'media/{secure_filename(photo.filename)}'
+                check_image(photo)
+                # Guardamos el archivo sin procesar, un trabajo en segundo plano
+                # genera los tamaños de avatar y actualiza el campo "photo".
+                photo_job = Job('avatar', user.id, save_upload(photo))
+                db.session.add(photo_job)
                 
-            except SQLAlchemyError as e:
+            except (InvalidImage, OSError) as e:
                 error = f'Error al guardar nueva foto de perfíl. Intenta nuevamente. Mensaje: {str(e)}.'
 
         if error is not None:
             flash(error)
         else:
             try:
+                touch_author_posts(user.id)
                 db.session.commit()
 
             except Exception as e:
@@ -225,8 +364,68 @@ def profile(id):
                 error = f"Error al guardar los cambios en la base de datos, inténtalo de nuevo más tarde. Código de error: {str(e)}"
 
             else:
+                forget_author(user.id)
+
+                if photo_job is not None:
+                    enqueue(photo_job)
+
                 return redirect(url_for('auth.profile', id=user.id))
 
         flash(error)
 
-    return render_template('auth/profile.html', user=user)
+    return render_template(
+        'auth/profile.html',
+        user=user,
+        photo_pending=has_pending('avatar', user.id)
+    )
+
+
+def touch_author_posts(user_id):
+    """
+    Las páginas de los posts muestran el nombre y la foto del autor,
+    al cambiar actualizamos su versión (ETag / Last-Modified).
+
+    Args:
+        user_id (int): id del autor.
+    """
+    Post.query.filter_by(author=user_id) \
+        .update({Post.updated: datetime.utcnow()}, synchronize_session=False)
+
+
+def forget_author(user_id):
+    """
+    Los datos del usuario cambiaron (ya confirmados), lo quitamos
+    de la caché junto con las páginas de sus posts.
+
+    Args:
+        user_id (int): id del autor.
+    """
+    forget_user(user_id)
+    invalidate_pages(url for url, in db.session.query(Post.url).filter_by(author=user_id))
+
+
+# @audit Job avatar
+@handler('avatar')
+def process_photo_job(job):
+    """
+    Trabajo en segundo plano que procesa la foto subida en (auth.profile).
+
+    Args:
+        job (Job): Trabajo con el id del usuario y la ruta del archivo subido.
+    """
+    user = db.session.get(User, job.user_id)
+
+    with open(job.payload, 'rb') as file:
+        # Generamos la foto en los tamaños de avatar (WebP/JPEG sin EXIF) en el
+        # almacén de archivos y guardamos en el campo "photo" la ruta en la Base de Datos.
+        photo = store_avatar(file)
+
+    # La foto anterior pierde una referencia (se elimina con `flask media gc`).
+    release(user.photo)
+    user.photo = photo
+
+    touch_author_posts(user.id)
+    db.session.commit()
+
+    forget_author(user.id)
+    os.remove(job.payload)
@@ -0,0 +1,257 @@
+"""
+Cachés de la aplicación.
+
+Todas combinan expulsión LRU (por cantidad de elementos) con
+expiración por tiempo (TTL) y exponen get/set/delete/clear:
+    MemoryCache: en memoria del proceso, segura entre hilos.
+    FileSystemCache: en disco, compartida entre los workers.
+    NullCache: deshabilitada.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from .assets import asset_version
+
+
+# @audit Class MemoryCache
+class MemoryCache():
+    """
+    Caché LRU con expiración por tiempo.
+
+    Args:
+        maxsize (int): Cantidad máxima de elementos, al superarla
+        se elimina el elemento usado hace más tiempo.
+        ttl (int): Segundos que vive cada elemento.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Obtiene un elemento si existe y no ha expirado.
+
+        Returns:
+            value: El valor guardado o default.
+        """
+        with self._lock:
+            item = self._items.get(key)
+
+            if item is None:
+                return default
+
+            value, expires = item
+
+            if expires < time.monotonic():
+                del self._items[key]
+                return default
+
+            self._items.move_to_end(key)
+
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Guarda un elemento, opcionalmente con un TTL distinto al de la caché.
+        """
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._items[key] = (value, expires)
+            self._items.move_to_end(key)
+
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        """ Elimina un elemento de la caché (si existe). """
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        """ Elimina todos los elementos de la caché. """
+        with self._lock:
+            self._items.clear()
+
+
+# @audit Class FileSystemCache
+class FileSystemCache():
+    """
+    Caché compartida entre procesos (workers) del mismo servidor.
+
+    Cada elemento se guarda en un archivo dentro de `directory`.
+    La fecha de modificación del archivo se actualiza en cada lectura
+    y al superar `maxsize` se eliminan los menos usados (LRU).
+
+    Args:
+        directory (string): Carpeta donde se guardan los elementos.
+        maxsize (int): Cantidad máxima de elementos.
+        ttl (int): Segundos que vive cada elemento.
+    """
+
+    def __init__(self, directory, maxsize=1024, ttl=60):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(str(key).encode()).hexdigest())
+
+    def get(self, key, default=None):
+        path = self._path(key)
+
+        try:
+            with open(path, 'rb') as file:
+                expires, value = pickle.load(file)
+
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+
+        if expires < time.time():
+            self._remove(path)
+            return default
+
+        # Marcamos el elemento como usado recientemente.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        path = self._path(key)
+
+        # Escribimos en un archivo temporal y lo renombramos para que
+        # otro proceso nunca lea un elemento a medio escribir.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump((expires, value), file, pickle.HIGHEST_PROTOCOL)
+
+        os.replace(tmp, path)
+        self._prune()
+
+    def delete(self, key):
+        self._remove(self._path(key))
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            self._remove(entry.path)
+
+    def _prune(self):
+        entries = [entry for entry in os.scandir(self.directory) if not entry.name.startswith('.tmp')]
+
+        if len(entries) <= self.maxsize:
+            return
+
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+
+        for entry in entries[:len(entries) - self.maxsize]:
+            self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# @audit Class NullCache
+class NullCache():
+    """ Caché deshabilitada, nunca guarda elementos. """
+
+    def get(self, key, default=None):
+        return default
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+def create_cache(type, maxsize, ttl, directory=None):
+    """
+    Function que crea una caché según su tipo.
+
+    Args:
+        type (string): 'memory', 'filesystem' o 'null'.
+        maxsize (int): Cantidad máxima de elementos.
+        ttl (int): Segundos que vive cada elemento.
+        directory (string): Carpeta de la caché 'filesystem'.
+
+    Returns:
+        cache: Instancia de MemoryCache, FileSystemCache o NullCache.
+    """
+    if type == 'memory':
+        return MemoryCache(maxsize, ttl)
+
+    if type == 'filesystem':
+        return FileSystemCache(directory, maxsize, ttl)
+
+    return NullCache()
+
+
+# * Caché de páginas públicas (blog.html para lectores anónimos).
+def page_key(url):
+    """
+    Function que genera la llave de la página de un post,
+    incluye la versión de los archivos estáticos (las urls con hash).
+
+    Args:
+        url (string): url del post.
+
+    Returns:
+        string: Llave de la página en la caché.
+    """
+    return f'blog:{asset_version()}:{url}'
+
+
+def get_page_cache():
+    """
+    Returns:
+        cache: Caché de páginas configurada en init_app().
+    """
+    return current_app.extensions['page_cache']
+
+
+def invalidate_pages(urls):
+    """
+    Elimina de la caché las páginas de los posts indicados,
+    se llama al editar o eliminar un post y al cambiar el perfil del autor.
+
+    Args:
+        urls (list): urls de los posts.
+    """
+    cache = get_page_cache()
+
+    for url in urls:
+        cache.delete(page_key(url))
+
+
+def init_app(app):
+    """
+    Crea la caché de páginas según PAGE_CACHE_TYPE
+    ('memory', 'filesystem' o 'null').
+    """
+    app.extensions['page_cache'] = create_cache(
+        app.config['PAGE_CACHE_TYPE'],
+        app.config['PAGE_CACHE_SIZE'],
+        app.config['PAGE_CACHE_TTL'],
+        directory=app.config['PAGE_CACHE_DIR'] or os.path.join(app.instance_path, 'page_cache')
+    )
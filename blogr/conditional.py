@@ -0,0 +1,116 @@
+"""
+Solicitudes condicionales HTTP (ETag / Last-Modified / 304).
+
+Las vistas calculan sus validadores con una consulta ligera y
+llaman a not_modified() antes de renderizar la plantilla; si el
+navegador (o la CDN) ya tiene la versión actual se responde 304
+sin cuerpo.
+"""
+import hashlib
+from datetime import timezone
+from flask import (
+    g,
+    make_response,
+    request,
+    session
+)
+from .assets import asset_version
+
+
+def make_etag(*parts):
+    """
+    Function que genera un ETag fuerte a partir de las
+    partes que identifican la versión de la página.
+
+    La página incluye el encabezado del usuario activo y las urls
+    de los archivos estáticos, también forman parte del ETag.
+
+    Args:
+        *parts: Valores que identifican la versión (id, fecha de actualización...).
+
+    Returns:
+        string: ETag (sin comillas).
+    """
+    user = tuple(g.user) if g.get('user') else None
+    value = repr(parts + (user, asset_version())).encode()
+
+    return hashlib.sha1(value).hexdigest()
+
+
+def http_date(value):
+    """
+    Convierte una fecha UTC sin zona horaria (como las de los modelos)
+    en una fecha con zona UTC y sin microsegundos, la precisión de HTTP.
+    """
+    if value is None:
+        return None
+
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def is_conditional_safe():
+    """
+    Indica si la página puede validarse con ETag, los mensajes
+    flash pendientes cambian el cuerpo sin cambiar la versión.
+    """
+    return request.method in ('GET', 'HEAD') and '_flashes' not in session
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Function que revisa If-None-Match / If-Modified-Since.
+
+    Args:
+        etag (string): ETag actual de la página.
+        last_modified (datetime): Fecha de la última modificación (UTC).
+
+    Returns:
+        Response: Respuesta 304 si el cliente tiene la versión actual,
+        None si hay que renderizar la página.
+    """
+    if not is_conditional_safe():
+        return None
+
+    last_modified = http_date(last_modified)
+
+    # If-None-Match tiene prioridad sobre If-Modified-Since (RFC 9110).
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    elif request.if_modified_since and last_modified:
+        fresh = last_modified <= request.if_modified_since
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+
+    return add_validators(make_response('', 304), etag, last_modified)
+
+
+def add_validators(response, etag, last_modified=None):
+    """
+    Agrega ETag, Last-Modified y Cache-Control a la respuesta.
+
+    Args:
+        response (Response | string): Respuesta de la vista.
+        etag (string): ETag actual de la página.
+        last_modified (datetime): Fecha de la última modificación (UTC).
+
+    Returns:
+        Response: Respuesta con los validadores.
+    """
+    response = make_response(response)
+
+    if not is_conditional_safe():
+        return response
+
+    response.set_etag(etag)
+
+    if last_modified is not None:
+        response.last_modified = http_date(last_modified)
+
+    # El cliente debe revalidar siempre; la página depende de la cookie de sesión.
+    response.headers['Cache-Control'] = 'private, no-cache' if g.get('user') else 'public, no-cache'
+    response.vary.add('Cookie')
+
+    return response
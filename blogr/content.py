@@ -0,0 +1,348 @@
+"""
+Procesamiento del contenido de los posts al guardarlos.
+
+El HTML que envía CKEditor se procesa una sola vez, al crear o editar
+el post, y se guardan tres columnas listas para leer:
+    content_html: HTML limpio (lista de etiquetas/atributos permitidos),
+        imágenes con loading="lazy", títulos con id para enlazarlos y
+        enlaces externos con rel="nofollow noopener noreferrer".
+    content_text: texto plano (índice de búsqueda).
+    excerpt: resumen corto del texto.
+
+Post.content conserva el HTML original para volver a editarlo. Si
+cambian las reglas se incrementa PIPELINE_VERSION y
+`flask content rerender` vuelve a procesar los posts guardados.
+"""
+import re
+import unicodedata
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+import click
+from flask.cli import AppGroup
+from sqlalchemy.orm import undefer
+from blogr import db
+from .models import Post
+
+
+# ! Incrementar al cambiar las reglas (flask content rerender).
+PIPELINE_VERSION = 1
+
+# Longitud máxima del resumen (Post.excerpt).
+EXCERPT_LENGTH = 280
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'address', 'b', 'big', 'blockquote', 'br', 'caption', 'cite',
+    'code', 'dd', 'del', 'div', 'dl', 'dt', 'em', 'figcaption', 'figure',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'ins', 'kbd', 'li',
+    'mark', 'ol', 'p', 'pre', 'q', 's', 'samp', 'small', 'span', 'strike',
+    'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead',
+    'tr', 'tt', 'u', 'ul', 'var'
+}
+
+# Etiquetas que se eliminan junto con su contenido.
+DROP_CONTENT = {
+    'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript',
+    'textarea', 'select', 'title', 'head', 'svg', 'math'
+}
+
+VOID_TAGS = {'br', 'hr', 'img'}
+
+# Etiquetas que separan palabras en el texto plano.
+BLOCK_TAGS = {
+    'address', 'blockquote', 'br', 'caption', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'li',
+    'ol', 'p', 'pre', 'table', 'td', 'th', 'tr', 'ul'
+}
+
+# Títulos que reciben un id para enlazarlos (#titulo).
+ANCHOR_TAGS = {'h2', 'h3', 'h4'}
+
+GLOBAL_ATTRIBUTES = {'title', 'lang', 'dir', 'style'}
+
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'target'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'ol': {'start', 'type'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'table': {'border', 'cellpadding', 'cellspacing', 'summary'},
+    'q': {'cite'},
+    'blockquote': {'cite'}
+}
+
+URL_ATTRIBUTES = {'href', 'src', 'cite'}
+
+URL_SCHEMES = {'', 'http', 'https', 'mailto', 'tel'}
+
+# Imágenes pegadas en CKEditor (base64).
+DATA_IMAGE = re.compile(r'^data:image/(png|gif|jpe?g|webp);base64,[a-z0-9+/=\s]+$', re.I)
+
+ALLOWED_STYLES = {
+    'background-color', 'border', 'border-collapse', 'border-spacing', 'color',
+    'float', 'font-family', 'font-size', 'font-style', 'font-weight', 'height',
+    'list-style-type', 'margin', 'margin-left', 'margin-right', 'padding',
+    'text-align', 'text-decoration', 'vertical-align', 'width'
+}
+
+STYLE_VALUE = re.compile(r'^[#\w\s.,%\'"-]+$|^(rgba?|hsla?)\([\d\s.,%]+\)$')
+
+
+def _safe_url(value, image=False):
+    # Los navegadores ignoran espacios y caracteres de control en el esquema.
+    cleaned = re.sub(r'[\x00-\x20]+', '', value)
+
+    if image and DATA_IMAGE.match(cleaned):
+        return value
+
+    try:
+        scheme = urlsplit(cleaned).scheme.lower()
+    except ValueError:
+        return None
+
+    return value if scheme in URL_SCHEMES else None
+
+
+def _safe_style(value):
+    rules = []
+
+    for declaration in value.split(';'):
+        name, _, style = declaration.partition(':')
+        name, style = name.strip().lower(), style.strip()
+
+        if name in ALLOWED_STYLES and style and STYLE_VALUE.match(style):
+            rules.append(f'{name}: {style}')
+
+    return '; '.join(rules) or None
+
+
+def slugify(text):
+    """
+    Function que convierte un título en un id para la url (#titulo).
+    """
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    text = re.sub(r'[^\w\s-]', '', text).strip().lower()
+
+    return re.sub(r'[-\s]+', '-', text) or 'seccion'
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self.text = []
+        self.stack = []
+        self.drop = 0
+        self.heading = None
+        self.ids = set()
+
+    # * Etiquetas.
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT:
+            if tag not in VOID_TAGS:
+                self.drop += 1
+            return
+
+        if self.drop:
+            return
+
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+
+        if tag not in ALLOWED_TAGS:
+            return
+
+        attributes = self.clean_attributes(tag, attrs)
+
+        if tag == 'img' and not attributes:
+            return
+
+        markup = ''.join(f' {name}="{escape(value)}"' for name, value in attributes)
+
+        if tag in VOID_TAGS:
+            self.output.append(f'<{tag}{markup}>')
+            return
+
+        if tag in ANCHOR_TAGS and self.heading is None:
+            # El id se agrega al cerrar el título, cuando se conoce su texto.
+            self.heading = (len(self.output), len(self.text), markup, len(self.stack))
+            self.output.append(None)
+        else:
+            self.output.append(f'<{tag}{markup}>')
+
+        self.stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+        if tag not in VOID_TAGS and tag in DROP_CONTENT:
+            self.drop -= 1
+        elif tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT:
+            self.drop = max(self.drop - 1, 0)
+            return
+
+        if self.drop:
+            return
+
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+
+        # Solo cerramos etiquetas abiertas, así el HTML nunca rompe la plantilla.
+        if tag not in self.stack:
+            return
+
+        while self.stack:
+            current = self.stack.pop()
+            self.close_tag(current)
+
+            if current == tag:
+                break
+
+    def close_tag(self, tag):
+        if self.heading is not None and self.heading[3] == len(self.stack):
+            index, start, markup, _ = self.heading
+            slug = base = slugify(''.join(self.text[start:]))
+            counter = 2
+
+            while slug in self.ids:
+                slug = f'{base}-{counter}'
+                counter += 1
+
+            self.ids.add(slug)
+            self.output[index] = f'<{tag} id="{slug}"{markup}>'
+            self.heading = None
+
+        self.output.append(f'</{tag}>')
+
+    def handle_data(self, data):
+        if self.drop:
+            return
+
+        self.output.append(escape(data, quote=False))
+        self.text.append(data)
+
+    # * Atributos.
+    def clean_attributes(self, tag, attrs):
+        allowed = GLOBAL_ATTRIBUTES | ALLOWED_ATTRIBUTES.get(tag, set())
+        attributes = {}
+
+        for name, value in attrs:
+            name = name.lower()
+
+            if name not in allowed or value is None:
+                continue
+
+            if name in URL_ATTRIBUTES:
+                value = _safe_url(value, image=(tag == 'img'))
+            elif name == 'style':
+                value = _safe_style(value)
+            elif name == 'target':
+                value = '_blank' if value == '_blank' else None
+
+            if value is not None:
+                attributes[name] = value
+
+        if tag == 'img':
+            if 'src' not in attributes:
+                return []
+
+            attributes['loading'] = 'lazy'
+            attributes['decoding'] = 'async'
+
+        if tag == 'a' and urlsplit(attributes.get('href', '')).scheme.lower() in ('http', 'https'):
+            attributes['rel'] = 'nofollow noopener noreferrer'
+
+        return list(attributes.items())
+
+    def result(self):
+        while self.stack:
+            self.close_tag(self.stack.pop())
+
+        return ''.join(self.output), ' '.join(''.join(self.text).split())
+
+
+def sanitize(html):
+    """
+    Function que limpia el HTML de CKEditor.
+
+    Args:
+        html (string): HTML enviado por el usuario.
+
+    Returns:
+        tuple: (HTML limpio, texto plano).
+    """
+    parser = _Sanitizer()
+    parser.feed(html or '')
+    parser.close()
+
+    return parser.result()
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """
+    Function que corta el texto en la última palabra completa.
+    """
+    if len(text) <= length:
+        return text
+
+    return text[:length - 1].rsplit(' ', 1)[0].rstrip(' ,.;:') + '…'
+
+
+# @audit Function render_post()
+def render_post(post):
+    """
+    Function que procesa Post.content y guarda las columnas
+    content_html, content_text y excerpt.
+
+    Args:
+        post (Post): Post creado o editado.
+    """
+    post.content_html, post.content_text = sanitize(post.content)
+    post.excerpt = make_excerpt(post.content_text)
+    post.content_version = PIPELINE_VERSION
+
+
+# @audit CLI flask content
+cli = AppGroup('content', help='Procesamiento del contenido de los posts.')
+
+
+@cli.command('rerender')
+@click.option('--all', 'everything', is_flag=True, help='Procesa también los posts de la versión actual.')
+@click.option('--batch', default=100, show_default=True, help='Posts por transacción.')
+def rerender_command(everything, batch):
+    """ Vuelve a procesar los posts guardados con otra PIPELINE_VERSION. """
+    from .search import get_backend
+
+    backend = get_backend()
+    last_id = 0
+    total = 0
+
+    while True:
+        query = Post.query.options(undefer(Post.content)).filter(Post.id > last_id)
+
+        if not everything:
+            query = query.filter(Post.content_version != PIPELINE_VERSION)
+
+        posts = query.order_by(Post.id).limit(batch).all()
+
+        if not posts:
+            break
+
+        for post in posts:
+            render_post(post)
+            backend.index_post(post)
+
+        db.session.commit()
+        last_id = posts[-1].id
+        total += len(posts)
+
+    click.echo(f'{total} posts procesados (versión {PIPELINE_VERSION}).')
+
+
+def init_app(app):
+    """ Registra el CLI del contenido. """
+    app.cli.add_command(cli)
@@ -0,0 +1,220 @@
+"""
+Configuración del pool de conexiones de SQLAlchemy.
+
+Las opciones del motor salen de config.Config (variables de entorno):
+    DB_POOL_SIZE / DB_MAX_OVERFLOW: conexiones por worker.
+    DB_POOL_TIMEOUT: segundos de espera por una conexión libre.
+    DB_POOL_RECYCLE: segundos antes de reemplazar una conexión.
+    DB_POOL_PRE_PING: revisa la conexión antes de usarla.
+    DB_STATEMENT_TIMEOUT: milisegundos máximos por consulta (PostgreSQL).
+    DB_EXTERNAL_POOLER: PgBouncer en modo transaction; la aplicación no
+        mantiene conexiones (NullPool) ni estado de sesión.
+
+El tiempo de espera por una conexión del pool se publica en /metrics.
+
+Réplicas de lectura (DATABASE_REPLICA_URLS): las vistas marcadas con
+@read_replica envían sus SELECT a una réplica (SQLALCHEMY_BINDS
+'replica_0', 'replica_1'...); las escrituras siempre van a la base
+principal. Después de una solicitud que modifica datos (POST...), el
+navegador lee de la principal durante DB_REPLICA_STICKY segundos para
+ver sus propios cambios aunque la réplica tenga retraso.
+"""
+import functools
+import random
+import time
+from flask import (
+    current_app,
+    g,
+    has_app_context,
+    request,
+    session
+)
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import (
+    NullPool,
+    QueuePool
+)
+from sqlalchemy.sql.elements import TextClause
+
+
+# Llave de la sesión (cookie) con el fin de la lectura desde la base principal.
+STICKY_KEY = '_db_primary_until'
+
+
+def timed_pool(metrics, bind):
+    """
+    Function que crea un QueuePool que mide la espera al tomar una conexión.
+
+    Args:
+        metrics (Metrics): Registro de métricas de la aplicación.
+        bind (string): Etiqueta del motor ('primary', 'replica_0'...).
+
+    Returns:
+        type: Clase del pool.
+    """
+    class TimedQueuePool(QueuePool):
+        def _do_get(self):
+            start = time.perf_counter()
+
+            try:
+                return super()._do_get()
+
+            except TimeoutError:
+                metrics.incr('blogr_db_pool_timeouts_total', bind=bind)
+                raise
+
+            finally:
+                metrics.incr('blogr_db_pool_wait_seconds_total', time.perf_counter() - start, bind=bind)
+                metrics.incr('blogr_db_pool_checkouts_total', bind=bind)
+
+    return TimedQueuePool
+
+
+def engine_options(config, metrics, uri, bind='primary'):
+    """
+    Function que genera las opciones de un motor.
+
+    Args:
+        config (Config): Configuración de la aplicación.
+        metrics (Metrics): Registro de métricas.
+        uri (string): url de la base de datos.
+        bind (string): Etiqueta del motor en las métricas.
+
+    Returns:
+        dict: Opciones para create_engine().
+    """
+    options = {}
+    url = make_url(uri)
+    postgresql = url.get_backend_name() == 'postgresql'
+
+    if config['DB_EXTERNAL_POOLER']:
+        # El pooler reparte las conexiones, mantenerlas aquí solo las duplica.
+        options['poolclass'] = NullPool
+    elif url.database not in (None, '', ':memory:'):
+        options.update(
+            poolclass=timed_pool(metrics, bind),
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+            pool_pre_ping=config['DB_POOL_PRE_PING']
+        )
+
+    if postgresql and config['DB_STATEMENT_TIMEOUT'] and not config['DB_EXTERNAL_POOLER']:
+        # Parámetro de la sesión al conectar (PgBouncer no lo acepta, ver init_app).
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT']}"}
+
+    return options
+
+
+def set_local_timeout(timeout):
+    """
+    Listener de 'begin': con PgBouncer en modo transaction no hay
+    estado de sesión, el límite se aplica en cada transacción.
+    """
+    def listener(connection):
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout)}')
+
+    return listener
+
+
+# @audit Class RoutingSession
+class RoutingSession(Session):
+    """
+    Sesión que envía los SELECT a la réplica elegida para la
+    solicitud (g.db_replica); todo lo demás va a la base principal.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = g.get('db_replica') if has_app_context() else None
+
+        if replica and bind is None and not self._flushing and is_read(clause):
+            return self._db.engines[replica]
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def is_read(clause):
+    """ Indica si la consulta solo lee (select() o text('SELECT ...')). """
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() == 'SELECT'
+
+    return getattr(clause, 'is_select', False)
+
+
+def read_replica(view):
+    """
+    Decorador de las vistas de solo lectura: sus consultas GET
+    se envían a una réplica, salvo que el usuario acabe de escribir.
+    """
+    @functools.wraps(view)
+    def wrapped_view(**kwargs):
+        replicas = current_app.extensions['db_replicas']
+
+        if replicas and request.method in ('GET', 'HEAD') and session.get(STICKY_KEY, 0) < time.time():
+            g.db_replica = random.choice(replicas)
+
+        return view(**kwargs)
+
+    return wrapped_view
+
+
+def configure(app):
+    """
+    Agrega SQLALCHEMY_ENGINE_OPTIONS y las réplicas (SQLALCHEMY_BINDS)
+    a la configuración (llamar antes de db.init_app y después de metrics.init_app).
+    """
+    metrics = app.extensions['metrics']
+
+    options = engine_options(app.config, metrics, app.config['SQLALCHEMY_DATABASE_URI'])
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    replicas = []
+
+    for i, uri in enumerate(app.config['DATABASE_REPLICA_URLS']):
+        key = f'replica_{i}'
+        binds[key] = dict(engine_options(app.config, metrics, uri, key), url=uri)
+        replicas.append(key)
+
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.extensions['db_replicas'] = replicas
+
+    metrics.describe('blogr_db_pool_wait_seconds_total', 'Segundos esperando una conexión del pool.')
+    metrics.describe('blogr_db_pool_checkouts_total', 'Conexiones tomadas del pool.')
+    metrics.describe('blogr_db_pool_timeouts_total', 'Esperas del pool que superaron DB_POOL_TIMEOUT.')
+
+
+def stick_to_primary(response):
+    """
+    Después de una solicitud que modifica datos, las lecturas del
+    navegador van a la base principal durante DB_REPLICA_STICKY segundos.
+    """
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        session[STICKY_KEY] = time.time() + current_app.config['DB_REPLICA_STICKY']
+
+    return response
+
+
+def init_app(app, db):
+    """
+    Registra los listeners del motor y el ruteo a las réplicas
+    (llamar después de db.init_app).
+    """
+    timeout = app.config['DB_STATEMENT_TIMEOUT']
+
+    if app.config['DB_EXTERNAL_POOLER'] and timeout:
+        with app.app_context():
+            engines = list(db.engines.values())
+
+        # La base principal y las réplicas.
+        for engine in engines:
+            if engine.dialect.name == 'postgresql':
+                event.listen(engine, 'begin', set_local_timeout(timeout))
+
+    if app.extensions['db_replicas']:
+        app.after_request(stick_to_primary)
@@ -0,0 +1,69 @@
+"""
+Carga de CKEditor solo en las páginas del editor.
+
+El paquete (CKEDITOR_PKG_TYPE) se sirve desde la aplicación
+(/ckeditor/static/...) y solo lo incluyen admin/create.html y
+admin/update.html con {{ load_editor() }}, con `defer` para no
+bloquear el render de la página.
+
+La url de ckeditor.js lleva la versión de Flask-CKEditor (?v=...) y
+CKEditor agrega ?t=... a sus plugins, idiomas y estilos; con esa
+versión en la url los archivos se guardan en caché por un año.
+"""
+from importlib.metadata import (
+    PackageNotFoundError,
+    version
+)
+from flask import (
+    current_app,
+    request,
+    url_for
+)
+from markupsafe import Markup
+from .serving import set_immutable
+
+
+def load_editor():
+    """
+    Function (global de Jinja) que genera el <script> de CKEditor.
+
+    Returns:
+        Markup: Etiqueta script con defer.
+    """
+    url = url_for(
+        'ckeditor.static',
+        filename=f"{current_app.config['CKEDITOR_PKG_TYPE']}/ckeditor.js",
+        v=current_app.extensions['editor']
+    )
+
+    return Markup(f'<script src="{url}" defer></script>')
+
+
+def cached(view):
+    """
+    Envuelve la vista static de CKEditor: los archivos con versión
+    en la url se envían con Cache-Control immutable.
+    """
+    def send_editor_static(filename):
+        response = view(filename)
+
+        if 'v' in request.args or 't' in request.args:
+            set_immutable(response)
+
+        return response
+
+    return send_editor_static
+
+
+def init_app(app):
+    """
+    Registra load_editor() en las plantillas y la caché de los
+    archivos de CKEditor (llamar después de CKEditor(app)).
+    """
+    try:
+        app.extensions['editor'] = version('flask-ckeditor')
+    except PackageNotFoundError:
+        app.extensions['editor'] = '0'
+
+    app.view_functions['ckeditor.static'] = cached(app.view_functions['ckeditor.static'])
+    app.add_template_global(load_editor)
@@ -1,99 +1,250 @@
+from datetime import datetime
 from flask import (
     Blueprint, 
     render_template, 
-    request
+    request,
+    current_app,
+    session,
+    abort,
+    g
 )
-from .models import (
-    User, 
-    Post
+from blogr import db
+from .models import Post
+from .cache import (
+    get_page_cache,
+    page_key
 )
+from .conditional import (
+    make_etag,
+    not_modified,
+    add_validators
+)
+from .search import get_backend
+from .content import sanitize
+from .database import read_replica
+from sqlalchemy import tuple_
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import (
+    joinedload,
+    selectinload,
+    undefer
+)
 
 
 # Creamos Blueprint home
 bp = Blueprint('home', __name__)
 
 
-def get_user(id):
+def with_author(query):
     """
-    Function para obtener datos el usuario.
+    Function que agrega la carga en lote del autor
+    a una consulta de posts.
 
     Args:
-        id (int): Se espera recibir el id del usuario 
-        a obtener en la consulta.
+        query (Query): Consulta de posts a la que se le
+        agregara la carga del autor.
 
     Returns:
-        user: Retorna todo los datos del usuario.
+        query: Consulta que trae a todos los autores en
+        una sola consulta adicional (SELECT ... IN).
     """
-    try:
-        user = User.query.get(id)
-    
-    except SQLAlchemyError as e:
-        print(f'No se encontro usuairo on id "{id}". Mensaje: {str(e)}.')
-    
-    else:
-        return user
-    
-    
-def search_post(query):
+    return query.options(selectinload(Post.author_user))
+
+
+def search_post(query, page=1):
     """
     Function que búsca los blogs públicados
-    por el usuario, Por título.
+    por título, descripción y contenido con el
+    motor de búsqueda configurado (blogr/search.py).
 
     Args:
         query (string): Se espera el texto escrito
         por el usuario en la búsqueda.
+        page (int): Página de resultados solicitada.
 
     Returns:
-        posts: Retorna el resultado de búsqueda.
-        Blog públicado.
+        SearchPage: Retorna el resultado de búsqueda.
+        Blogs públicados y fragmentos resaltados.
     """
     try:
-        posts = Post.query.filter(Post.title.ilike(f'%{query}%')).all()
+        results = get_backend().search(query, page, current_app.config['SEARCH_PER_PAGE'])
     except SQLAlchemyError as e:
         print(f'Error al búscar el Blog "{query}. Mensaje: {str(e)}"')
     else:
-        return posts
-    
+        return results
+
+
+def encode_cursor(post):
+    """
+    Function que genera el cursor de paginación
+    a partir del último post mostrado.
+
+    Args:
+        post (Post): Último post de la página actual.
+
+    Returns:
+        string: Cursor con la fecha de creación y el id del post.
+    """
+    return f'{post.created.isoformat()}_{post.id}'
+
+
+def decode_cursor(cursor):
+    """
+    Function que obtiene la fecha de creación y el id
+    guardados en el cursor de paginación.
+
+    Args:
+        cursor (string): Cursor recibido en la url (?before=).
+
+    Returns:
+        tuple: (created, id) o None si el cursor no es válido.
+    """
+    try:
+        created, id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created), int(id)
+
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_feed(before=None):
+    """
+    Function que obtiene una página del feed ordenada
+    del post más reciente al más antiguo (paginación keyset).
+
+    Args:
+        before (string): Cursor del último post de la página anterior.
+
+    Returns:
+        tuple: (posts, next_cursor) Posts de la página y cursor
+        de la siguiente página (None si no hay más posts).
+    """
+    per_page = current_app.config['POSTS_PER_PAGE']
+    query = with_author(Post.query)
+
+    cursor = decode_cursor(before)
+
+    if cursor is not None:
+        query = query.filter(tuple_(Post.created, Post.id) < cursor)
+
+    # Pedimos un post extra para saber si existe una página siguiente.
+    posts = query.order_by(Post.created.desc(), Post.id.desc()).limit(per_page + 1).all()
+
+    next_cursor = None
+
+    if len(posts) > per_page:
+        posts = posts[:per_page]
+        next_cursor = encode_cursor(posts[-1])
+
+    return posts, next_cursor
+
 
 # @audit Route /
 @bp.route('/', methods=['GET', 'POST'])
+@read_replica  # Los GET leen de una réplica.
 def index():
     """
     Function que muestra la página principal
-    de la página principal. Y obtiene todos los
-    posts públicados por el usuario.
+    de la página principal. Y obtiene una página
+    de los posts públicados por los usuarios.
 
     Returns:
         render_template: Renderiza la plantilla index.html
     """
+    posts = []
+    next_cursor = None
+
     try:
-        posts = Post.query.all()
-        
-        if request.method == 'POST':
-            query = request.form.get('search')
-            posts = search_post(query)
+        query = request.values.get('search')
+
+        if query is not None:
+            results = search_post(query, request.args.get('page', 1, type=int))
             value = "hidden"
-            
-            return render_template('index.html', posts=posts, get_user=get_user, value=value)
+
+            return render_template('index.html', results=results, query=query, value=value)
+
+        posts, next_cursor = get_feed(request.args.get('before'))
+
+        # Versión de la página: los posts que muestra (id y fecha de actualización)
+        # y el cursor siguiente; borrar o crear un post cambia la lista.
+        # Sin Last-Modified: borrar un post no cambia ninguna fecha.
+        etag = make_etag(
+            'feed',
+            request.args.get('before'),
+            [(post.id, post.updated) for post in posts],
+            next_cursor
+        )
+        response = not_modified(etag)
+
+        if response is not None:
+            return response
+
+        return add_validators(
+            render_template('index.html', posts=posts, next_cursor=next_cursor),
+            etag
+        )
         
     except SQLAlchemyError as e:
         print(f'Error al traer Blogs públicados. Mensaje: {str(e)}')
         
-    return render_template('index.html', posts=posts, get_user=get_user)
+    return render_template('index.html', posts=posts, next_cursor=next_cursor)
 
 
 # @audit Route /blog
 @bp.route('/blog/<url>')
+@read_replica
 def blog(url):
-    """_summary_
+    """
+    Function que muestra un post públicado.
+
+    Responde 304 si el navegador ya tiene la versión actual
+    (ETag / Last-Modified de Post.updated). Para lectores anónimos
+    la página se guarda en caché junto con la versión del post.
+
+    Args:
+        url (string): url del post.
 
     Returns:
-        _type_: _description_
+        render_template: Renderiza la plantilla blog.html
     """
     try:
-        post = Post.query.filter_by(url=url).first()
+        # Consulta ligera de la versión del post, antes de cualquier render.
+        version = db.session.query(Post.id, Post.updated).filter_by(url=url).first()
     except SQLAlchemyError as e:
         print(f'Error al búscar url "{url}" en la base de datos. Mensaje: {str(e)}.')
-    
-    return render_template('blog.html', post=post, get_user=get_user)
\ No newline at end of file
+        version = None
+
+    if version is None:
+        abort(404)
+
+    etag = make_etag('blog', version.id, version.updated)
+    response = not_modified(etag, version.updated)
+
+    if response is not None:
+        return response
+
+    # La página solo es igual para todos si no hay usuario ni mensajes pendientes.
+    cacheable = g.user is None and '_flashes' not in session
+    cached = get_page_cache().get(page_key(url)) if cacheable else None
+
+    if cached is not None and cached[0] == version.updated:
+        page = cached[1]
+    else:
+        post = Post.query.options(joinedload(Post.author_user), undefer(Post.content_html)) \
+            .filter_by(url=url).first()
+
+        if post is None:
+            abort(404)
+
+        content_html = post.content_html
+
+        if content_html is None:
+            # Post guardado antes del procesamiento al guardar (flask content rerender).
+            content_html = sanitize(post.content)[0]
+
+        page = render_template('blog.html', post=post, content_html=content_html)
+
+        if cacheable:
+            get_page_cache().set(page_key(url), (post.updated, page))
+
+    return add_validators(page, etag, version.updated)
@@ -0,0 +1,142 @@
+"""
+Procesamiento de imágenes de perfil.
+
+La foto subida se decodifica, se gira según su EXIF, se eliminan
+sus metadatos y se guarda en tamaños fijos (AVATAR_SIZES) con un
+nombre derivado del contenido (ver blogr/media.py):
+
+    <sha256>-30.webp
+    <sha256>-100.webp
+    <sha256>-200.webp
+
+En User.photo se guarda la plantilla '.../<sha256>-{size}.webp'
+y las plantillas HTML eligen el tamaño con avatar_url(photo, size).
+"""
+import hashlib
+import io
+import os
+from flask import url_for
+from PIL import (
+    Image,
+    ImageOps
+)
+
+
+# Tamaños (px) en los que se muestran las fotos de perfil.
+AVATAR_SIZES = (30, 100, 200)
+
+FORMATS = {
+    'webp': ('webp', 'WEBP'),
+    'jpeg': ('jpg', 'JPEG')
+}
+
+
+# @audit Class InvalidImage
+class InvalidImage(ValueError):
+    """ El archivo subido no es una imagen válida. """
+
+
+def open_image(data):
+    """
+    Function que decodifica la imagen y aplica la rotación del EXIF.
+
+    Args:
+        data (bytes): Contenido del archivo subido.
+
+    Returns:
+        Image: Imagen en RGB (o RGBA si tiene transparencia).
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image = ImageOps.exif_transpose(image)
+
+    except (OSError, Image.DecompressionBombError) as e:
+        raise InvalidImage(str(e)) from e
+
+    has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+
+    return image.convert('RGBA' if has_alpha else 'RGB')
+
+
+def check_image(file):
+    """
+    Function que revisa que el archivo subido sea una imagen.
+    No decodifica la imagen, se procesa en segundo plano.
+
+    Args:
+        file (FileStorage): Archivo del formulario.
+    """
+    try:
+        with Image.open(file.stream) as image:
+            image.verify()
+
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise InvalidImage(str(e)) from e
+
+    finally:
+        file.stream.seek(0)
+
+
+def save_avatar(data, directory, format='webp'):
+    """
+    Function que genera las fotos de perfil en todos los tamaños.
+
+    Args:
+        data (bytes): Contenido del archivo subido.
+        directory (string): Carpeta donde se guardan las imágenes.
+        format (string): 'webp' o 'jpeg'.
+
+    Returns:
+        string: Nombre base con el marcador {size}, ej. '<sha256>-{size}.webp'.
+    """
+    extension, pil_format = FORMATS[format]
+    digest = hashlib.sha256(data).hexdigest()
+    name = f'{digest}-{{size}}.{extension}'
+
+    image = open_image(data)
+
+    if pil_format == 'JPEG' and image.mode == 'RGBA':
+        # JPEG no tiene transparencia, usamos fondo blanco.
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+
+    os.makedirs(directory, exist_ok=True)
+
+    for size in AVATAR_SIZES:
+        path = os.path.join(directory, name.format(size=size))
+
+        # El nombre depende del contenido, si existe ya está procesada.
+        if os.path.exists(path):
+            continue
+
+        # Recorte cuadrado centrado; al no pasar exif se eliminan los metadatos.
+        avatar = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        avatar.save(path, pil_format, quality=85, optimize=True)
+
+    return name
+
+
+def avatar_url(photo, size):
+    """
+    Function (global de Jinja) que obtiene la url de la foto
+    de perfil en el tamaño más cercano al que se muestra.
+
+    Args:
+        photo (string): Valor de User.photo.
+        size (int): Ancho en px con el que se muestra.
+
+    Returns:
+        string: url del archivo estático.
+    """
+    if '{size}' in photo:
+        # Elegimos el menor tamaño que cubre el ancho solicitado.
+        size = next((s for s in AVATAR_SIZES if s >= size), AVATAR_SIZES[-1])
+        photo = photo.format(size=size)
+
+    return url_for('static', filename=photo)
+
+
+def init_app(app):
+    """ Registra avatar_url() en las plantillas. """
+    app.add_template_global(avatar_url)
@@ -0,0 +1,182 @@
+"""
+Cola de trabajos en segundo plano.
+
+Los trabajos se guardan en la tabla jobs (models.Job), así sobreviven
+a reinicios y se pueden reintentar. JOBS_MODE define quién los ejecuta:
+    thread: un pool de hilos del mismo proceso (por defecto).
+    sync: en la misma solicitud (pruebas / desarrollo).
+    queue: solo se guardan; los ejecuta `flask jobs drain`.
+
+Cada tipo de trabajo registra su función con @handler('tipo').
+"""
+import os
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy.exc import SQLAlchemyError
+from blogr import db
+from .models import Job
+
+
+# Funciones que procesan cada tipo de trabajo.
+HANDLERS = {}
+
+
+def handler(kind):
+    """
+    Decorador que registra la función que procesa un tipo de trabajo.
+
+    Args:
+        kind (string): Tipo de trabajo (Job.kind).
+    """
+    def decorator(function):
+        HANDLERS[kind] = function
+        return function
+
+    return decorator
+
+
+def save_upload(file):
+    """
+    Function que guarda el archivo subido sin procesar
+    para que lo tome un trabajo.
+
+    Args:
+        file (FileStorage): Archivo del formulario.
+
+    Returns:
+        string: Ruta del archivo guardado.
+    """
+    directory = current_app.config['JOBS_UPLOAD_DIR'] or os.path.join(current_app.instance_path, 'uploads')
+    os.makedirs(directory, exist_ok=True)
+
+    path = os.path.join(directory, uuid.uuid4().hex)
+    file.save(path)
+
+    return path
+
+
+def enqueue(job):
+    """
+    Function que envía un trabajo ya guardado (commit) a ejecutar.
+
+    Args:
+        job (Job): Trabajo confirmado en la base de datos.
+    """
+    mode = current_app.config['JOBS_MODE']
+
+    if mode == 'sync':
+        run_job(job.id)
+    elif mode == 'thread':
+        app = current_app._get_current_object()
+        app.extensions['jobs'].submit(_run_in_context, app, job.id)
+
+
+def _run_in_context(app, job_id):
+    with app.app_context():
+        run_job(job_id)
+
+
+def run_job(job_id):
+    """
+    Function que ejecuta un trabajo pendiente.
+
+    El trabajo se toma con un UPDATE condicional, así un mismo
+    trabajo nunca se ejecuta dos veces (pool de hilos y CLI al mismo tiempo).
+
+    Args:
+        job_id (int): id del trabajo.
+
+    Returns:
+        bool: True si se ejecutó correctamente.
+    """
+    claimed = Job.query.filter_by(id=job_id, status='pending') \
+        .update({Job.status: 'running', Job.attempts: Job.attempts + 1}, synchronize_session=False)
+    db.session.commit()
+
+    if not claimed:
+        return False
+
+    job = db.session.get(Job, job_id)
+
+    try:
+        HANDLERS[job.kind](job)
+        job.status = 'done'
+        job.error = None
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.status = 'failed'
+        job.error = f'{str(e)}\n{traceback.format_exc()}'
+
+        try:
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+
+        print(f'Error al ejecutar el trabajo "{job_id}". Mensaje: {str(e)}.')
+        return False
+
+    return True
+
+
+def has_pending(kind, user_id):
+    """
+    Indica si el usuario tiene trabajos de ese tipo sin terminar.
+    """
+    return db.session.query(
+        Job.query.filter(
+            Job.kind == kind,
+            Job.user_id == user_id,
+            Job.status.in_(('pending', 'running'))
+        ).exists()
+    ).scalar()
+
+
+# @audit CLI flask jobs
+cli = AppGroup('jobs', help='Administración de los trabajos en segundo plano.')
+
+
+@cli.command('drain')
+def drain_command():
+    """ Ejecuta todos los trabajos pendientes. """
+    done = failed = 0
+
+    for job_id, in db.session.query(Job.id).filter_by(status='pending').order_by(Job.id).all():
+        if run_job(job_id):
+            done += 1
+        else:
+            failed += 1
+
+    click.echo(f'{done} trabajos ejecutados, {failed} con error.')
+
+
+@cli.command('retry')
+@click.option('--stuck', is_flag=True, help='Incluye también los trabajos "running" (ej. el proceso se detuvo).')
+def retry_command(stuck):
+    """ Marca los trabajos con error como pendientes. """
+    statuses = ('failed', 'running') if stuck else ('failed',)
+
+    total = Job.query.filter(Job.status.in_(statuses)) \
+        .update({Job.status: 'pending'}, synchronize_session=False)
+    db.session.commit()
+
+    click.echo(f'{total} trabajos marcados como pendientes, ejecuta `flask jobs drain`.')
+
+
+def init_app(app):
+    """
+    Crea el pool de hilos (JOBS_MODE = 'thread') y registra el CLI.
+    """
+    if app.config['JOBS_MODE'] == 'thread':
+        app.extensions['jobs'] = ThreadPoolExecutor(
+            max_workers=app.config['JOBS_WORKERS'],
+            thread_name_prefix='blogr-jobs'
+        )
+
+    app.cli.add_command(cli)
@@ -0,0 +1,151 @@
+"""
+Almacén de archivos subidos direccionado por contenido.
+
+Cada archivo se guarda según el SHA-256 de su contenido, en carpetas
+repartidas por los primeros caracteres del hash:
+
+    static/media/<aa>/<bb>/<sha256>-{size}.webp
+
+Un mismo archivo subido por varios usuarios se guarda una sola vez; la
+tabla media lleva la cuenta de cuántos registros lo usan (User.photo) y
+`flask media gc` elimina los que ya nadie utiliza. Como la url de un
+archivo nunca cambia, se sirve con Cache-Control immutable (blogr/serving.py).
+"""
+import glob
+import hashlib
+import os
+from datetime import (
+    datetime,
+    timedelta
+)
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from blogr import db
+from .images import save_avatar
+from .models import Media
+
+
+def shard(digest):
+    """
+    Function que obtiene la carpeta (relativa a static) de un hash.
+
+    Args:
+        digest (string): SHA-256 del contenido.
+
+    Returns:
+        string: Ruta, ej. 'media/ab/cd'.
+    """
+    return f'media/{digest[:2]}/{digest[2:4]}'
+
+
+def files_of(path):
+    """
+    Function que obtiene los archivos en disco de un registro
+    (todos los tamaños si la ruta lleva el marcador {size}).
+    """
+    pattern = os.path.join(current_app.static_folder, path.replace('{size}', '*'))
+
+    return glob.glob(pattern)
+
+
+def store_avatar(file):
+    """
+    Function que guarda una foto de perfil en el almacén y suma
+    una referencia. Si el contenido ya existe no se vuelve a procesar.
+
+    Args:
+        file (file): Archivo subido (abierto en modo binario).
+
+    Returns:
+        string: Valor para User.photo, ej. 'media/ab/cd/<sha256>-{size}.webp'.
+    """
+    data = file.read()
+    digest = hashlib.sha256(data).hexdigest()
+    media = db.session.get(Media, digest)
+
+    if media is None or not files_of(media.path):
+        directory = shard(digest)
+        name = save_avatar(
+            data,
+            os.path.join(current_app.static_folder, directory),
+            current_app.config['AVATAR_FORMAT']
+        )
+
+        if media is None:
+            media = Media(digest, f'{directory}/{name}', len(data))
+            db.session.add(media)
+            db.session.flush()
+
+    acquire(media.path)
+
+    return media.path
+
+
+def acquire(path):
+    """
+    Suma una referencia al archivo del almacén.
+
+    Args:
+        path (string): Ruta guardada en el registro (ej. User.photo).
+    """
+    Media.query.filter_by(path=path) \
+        .update({Media.refcount: Media.refcount + 1}, synchronize_session=False)
+
+
+def release(path):
+    """
+    Resta una referencia al archivo del almacén, las rutas que no
+    son del almacén (fotos anteriores, imágenes por defecto) se ignoran.
+
+    Args:
+        path (string): Ruta que se deja de usar.
+    """
+    if path is None:
+        return
+
+    Media.query.filter(Media.path == path, Media.refcount > 0) \
+        .update({Media.refcount: Media.refcount - 1}, synchronize_session=False)
+
+
+def collect_garbage(grace):
+    """
+    Function que elimina los archivos sin referencias.
+
+    Args:
+        grace (timedelta): Tiempo mínimo sin uso, evita borrar
+        un archivo que se acaba de subir y aún no se asigna.
+
+    Returns:
+        int: Cantidad de archivos eliminados.
+    """
+    limit = datetime.utcnow() - grace
+    removed = 0
+
+    for media in Media.query.filter(Media.refcount <= 0, Media.updated < limit).all():
+        for path in files_of(media.path):
+            os.remove(path)
+            removed += 1
+
+        db.session.delete(media)
+
+    db.session.commit()
+
+    return removed
+
+
+# @audit CLI flask media
+cli = AppGroup('media', help='Administración del almacén de archivos subidos.')
+
+
+@cli.command('gc')
+@click.option('--grace', default=24, show_default=True, help='Horas sin referencias antes de eliminar un archivo.')
+def gc_command(grace):
+    """ Elimina los archivos que ya no utiliza ningún registro. """
+    removed = collect_garbage(timedelta(hours=grace))
+    click.echo(f'{removed} archivos eliminados.')
+
+
+def init_app(app):
+    """ Registra el CLI del almacén. """
+    app.cli.add_command(cli)
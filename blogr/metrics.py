@@ -0,0 +1,189 @@
+"""
+Métricas de la aplicación.
+
+Contadores y sumas que se publican en /metrics con el formato de texto
+de Prometheus.
+
+Cada worker de gunicorn tiene sus propios contadores y cada consulta de
+/metrics llega a un worker distinto. Con METRICS_DIR (gunicorn.conf.py lo
+define) cada proceso escribe sus contadores en METRICS_DIR/<pid>.json
+cada METRICS_FLUSH_INTERVAL segundos y /metrics publica la suma de todos
+los archivos: la serie es la de todo el servidor y rate() funciona. Los
+archivos de los workers reiniciados se conservan (los contadores no
+bajan), gunicorn vacía la carpeta al iniciar. Sin METRICS_DIR (servidor
+de desarrollo, un proceso) los contadores solo están en memoria.
+
+Solo responden las
+direcciones de METRICS_ALLOW (detrás de nginx requiere TRUSTED_PROXIES,
+si no todas las solicitudes llegan desde la IP del proxy).
+"""
+import atexit
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from flask import (
+    abort,
+    current_app,
+    request
+)
+
+
+# @audit Class Metrics
+class Metrics():
+    """
+    Registro de métricas del proceso.
+
+    Attributes:
+        counters (dict): {(nombre, etiquetas): valor} de este proceso.
+        help (dict): Descripción de cada métrica.
+        directory (string): Carpeta compartida entre procesos (METRICS_DIR) o None.
+        interval (float): Segundos entre escrituras del archivo del proceso.
+    """
+
+    def __init__(self, directory=None, interval=1.0):
+        self.counters = {}
+        self.help = {}
+        self.directory = directory
+        self.interval = interval
+        self.pid = os.getpid()
+        self._dirty = False
+        self._flusher = None
+        self._lock = threading.Lock()
+
+    def incr(self, name, value=1, **labels):
+        """
+        Suma `value` a la métrica.
+
+        Args:
+            name (string): Nombre, ej. 'blogr_login_rejected_total'.
+            value (float): Cantidad a sumar.
+            labels: Etiquetas, ej. reason='ip'.
+        """
+        key = (name, tuple(sorted(labels.items())))
+
+        with self._lock:
+            if self.pid != os.getpid():
+                # Worker creado con fork: los contadores del proceso principal no son suyos.
+                self.counters = {}
+                self.pid = os.getpid()
+                self._flusher = None
+
+            self.counters[key] = self.counters.get(key, 0) + value
+            self._dirty = True
+
+            if self.directory and self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name='blogr-metrics', daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+
+            if self._dirty:
+                self.flush()
+
+    def flush(self):
+        """
+        Escribe los contadores del proceso en METRICS_DIR/<pid>.json.
+        """
+        with self._lock:
+            if not self.directory or self.pid != os.getpid():
+                return
+
+            data = [[name, list(labels), value] for (name, labels), value in self.counters.items()]
+            self._dirty = False
+
+        # Archivo temporal + os.replace: los demás procesos nunca leen un archivo a medias.
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+
+        with os.fdopen(fd, 'w') as file:
+            json.dump(data, file)
+
+        os.replace(path, os.path.join(self.directory, f'{self.pid}.json'))
+
+    def collect(self):
+        """
+        Function que obtiene los contadores a publicar.
+
+        Returns:
+            dict: {(nombre, etiquetas): valor}, la suma de todos los
+            procesos si hay METRICS_DIR.
+        """
+        if not self.directory:
+            with self._lock:
+                return dict(self.counters)
+
+        self.flush()
+        totals = {}
+
+        for filename in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                with open(filename, encoding='utf-8') as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue
+
+            for name, labels, value in data:
+                key = (name, tuple(tuple(label) for label in labels))
+                totals[key] = totals.get(key, 0) + value
+
+        return totals
+
+    def render(self):
+        """
+        Function que genera el texto de /metrics.
+
+        Returns:
+            string: Métricas en formato de texto de Prometheus.
+        """
+        items = sorted(self.collect().items())
+
+        lines = []
+        described = set()
+
+        for (name, labels), value in items:
+            if name not in described:
+                described.add(name)
+
+                if name in self.help:
+                    lines.append(f'# HELP {name} {self.help[name]}')
+
+                lines.append(f'# TYPE {name} counter')
+
+            label = ','.join(f'{key}="{val}"' for key, val in labels)
+            lines.append(f'{name}{{{label}}} {value}' if label else f'{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def incr(name, value=1, **labels):
+    """ Suma `value` a la métrica de la aplicación actual. """
+    current_app.extensions['metrics'].incr(name, value, **labels)
+
+
+def metrics_view():
+    """
+    Vista /metrics.
+    """
+    if request.remote_addr not in current_app.config['METRICS_ALLOW']:
+        abort(404)
+
+    return current_app.extensions['metrics'].render(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+
+def init_app(app):
+    """ Crea el registro de métricas y la vista /metrics. """
+    directory = app.config['METRICS_DIR']
+
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    app.extensions['metrics'] = Metrics(directory, app.config['METRICS_FLUSH_INTERVAL'])
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
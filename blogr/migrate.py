@@ -0,0 +1,268 @@
+"""
+Migraciones del esquema de la base de datos (`flask db upgrade`).
+
+La aplicación ya no ejecuta db.create_all() al iniciar: cada cambio del
+esquema es un archivo numerado en migrations/ (MIGRATIONS_DIR):
+
+    migrations/0001_initial.py
+    migrations/0002_posts_updated.py
+    ...
+
+Cada archivo define upgrade(op) y, si crea índices con
+CREATE INDEX CONCURRENTLY (PostgreSQL), TRANSACTIONAL = False: se ejecuta
+fuera de una transacción y debe poder repetirse si falla a la mitad.
+La tabla schema_migrations guarda las versiones aplicadas.
+"""
+import importlib.util
+import os
+import re
+from collections import namedtuple
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    select,
+    text
+)
+from blogr import db
+
+
+FILENAME = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+# Llave del pg_advisory_lock, evita que dos despliegues migren a la vez.
+LOCK_ID = 20230801
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    'schema_migrations',
+    metadata,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('name', String(100), nullable=False),
+    Column('applied', DateTime, nullable=False)
+)
+
+Migration = namedtuple('Migration', ['version', 'name', 'module'])
+
+
+# @audit Class Operations
+class Operations():
+    """
+    Operaciones disponibles para las migraciones.
+
+    Attributes:
+        connection (Connection): Conexión de la migración.
+        dialect (string): 'postgresql', 'sqlite'...
+        transactional (bool): False si la migración corre sin transacción.
+        echo (function): Muestra mensajes de la migración (pasos omitidos...).
+    """
+
+    def __init__(self, connection, transactional, echo=print):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        self.transactional = transactional
+        self.echo = echo
+
+    def execute(self, sql, **params):
+        return self.connection.execute(text(sql), params)
+
+    def has_table(self, table):
+        return inspect(self.connection).has_table(table)
+
+    def has_column(self, table, column):
+        return any(c['name'] == column for c in inspect(self.connection).get_columns(table))
+
+    def create_table(self, table):
+        """ Crea la tabla (sa.Table) y sus índices si no existe. """
+        table.create(self.connection, checkfirst=True)
+
+    def add_column(self, table, column, definition):
+        """
+        Agrega la columna si no existe.
+
+        Args:
+            definition (string): Tipo y restricciones, ej. 'INTEGER NOT NULL DEFAULT 0'.
+        """
+        if not self.has_column(table, column):
+            self.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+    def create_index(self, name, table, expressions, using=None):
+        """
+        Crea un índice si no existe. En PostgreSQL, fuera de una
+        transacción, se usa CREATE INDEX CONCURRENTLY: la tabla sigue
+        aceptando escrituras mientras se construye.
+
+        Args:
+            name (string): Nombre del índice.
+            table (string): Tabla.
+            expressions (string): Columnas o expresión, ej. 'created, id'.
+            using (string): Método (gin, gist...), solo PostgreSQL.
+        """
+        concurrently = self.dialect == 'postgresql' and not self.transactional
+
+        if concurrently:
+            # Un CONCURRENTLY interrumpido deja el índice inválido, lo volvemos a crear.
+            invalid = self.execute(
+                'SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid '
+                'WHERE c.relname = :name AND NOT i.indisvalid',
+                name=name
+            ).first()
+
+            if invalid:
+                self.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+        method = f' USING {using}' if using and self.dialect == 'postgresql' else ''
+
+        self.execute(
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+            f'{name} ON {table}{method} ({expressions})'
+        )
+
+
+def discover(directory):
+    """
+    Function que carga las migraciones de la carpeta.
+
+    Returns:
+        list: Migraciones ordenadas por versión.
+    """
+    migrations = []
+
+    for filename in sorted(os.listdir(directory)):
+        match = FILENAME.match(filename)
+
+        if not match:
+            continue
+
+        spec = importlib.util.spec_from_file_location(
+            f'migrations.m{match.group(1)}',
+            os.path.join(directory, filename)
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        migrations.append(Migration(int(match.group(1)), match.group(2), module))
+
+    versions = [migration.version for migration in migrations]
+
+    if len(versions) != len(set(versions)):
+        raise click.ClickException('Hay migraciones con la misma versión.')
+
+    return migrations
+
+
+def applied_versions(engine):
+    """
+    Function que obtiene las versiones aplicadas.
+
+    Returns:
+        set: Versiones de schema_migrations.
+    """
+    with engine.begin() as connection:
+        metadata.create_all(connection)
+
+        versions = connection.execute(select(schema_migrations.c.version)).scalars()
+
+        return set(versions)
+
+
+def run_migration(engine, migration, echo=print):
+    """
+    Function que aplica una migración y registra su versión.
+    """
+    transactional = getattr(migration.module, 'TRANSACTIONAL', True)
+    record = schema_migrations.insert().values(
+        version=migration.version,
+        name=migration.name,
+        applied=datetime.utcnow()
+    )
+
+    if transactional:
+        with engine.begin() as connection:
+            migration.module.upgrade(Operations(connection, True, echo))
+            connection.execute(record)
+    else:
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            migration.module.upgrade(Operations(connection, False, echo))
+            connection.execute(record)
+
+
+# @audit Function upgrade()
+def upgrade(engine, directory, target=None, echo=print):
+    """
+    Function que aplica las migraciones pendientes en orden.
+
+    Args:
+        engine (Engine): Motor de la base de datos principal.
+        directory (string): Carpeta de migraciones.
+        target (int): Última versión a aplicar (por defecto todas).
+
+    Returns:
+        int: Cantidad de migraciones aplicadas.
+    """
+    migrations = discover(directory)
+    total = 0
+
+    # En AUTOCOMMIT: una transacción abierta bloquearía CREATE INDEX CONCURRENTLY.
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as lock:
+        if engine.dialect.name == 'postgresql':
+            lock.execute(text('SELECT pg_advisory_lock(:id)'), {'id': LOCK_ID})
+
+        try:
+            applied = applied_versions(engine)
+
+            for migration in migrations:
+                if migration.version in applied or (target is not None and migration.version > target):
+                    continue
+
+                echo(f'Aplicando {migration.version:04d}_{migration.name}...')
+                run_migration(engine, migration, echo)
+                total += 1
+
+        finally:
+            if engine.dialect.name == 'postgresql':
+                lock.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': LOCK_ID})
+
+    return total
+
+
+# @audit CLI flask db
+cli = AppGroup('db', help='Migraciones del esquema de la base de datos.')
+
+
+@cli.command('upgrade')
+@click.option('--to', 'target', type=int, help='Última versión a aplicar.')
+@click.option('--bind', help='Motor de SQLALCHEMY_BINDS, ej. una réplica local sin replicación.')
+def upgrade_command(target, bind):
+    """ Aplica las migraciones pendientes. """
+    engine = db.engines[bind] if bind else db.engine
+    total = upgrade(engine, current_app.config['MIGRATIONS_DIR'], target, echo=click.echo)
+    click.echo(f'{total} migraciones aplicadas.')
+
+
+@cli.command('status')
+def status_command():
+    """ Muestra las migraciones aplicadas y pendientes. """
+    applied = applied_versions(db.engine)
+
+    for migration in discover(current_app.config['MIGRATIONS_DIR']):
+        mark = 'x' if migration.version in applied else ' '
+        click.echo(f'[{mark}] {migration.version:04d}_{migration.name}')
+
+
+def init_app(app):
+    """
+    Registra el CLI de migraciones, no ejecuta DDL al iniciar.
+    """
+    if not app.config['MIGRATIONS_DIR']:
+        app.config['MIGRATIONS_DIR'] = os.path.join(os.path.dirname(app.root_path), 'migrations')
+
+    app.cli.add_command(cli)
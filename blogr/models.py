@@ -30,6 +30,12 @@ class User(db.Model):
 class Post(db.Model):
     # Colocamos nombre tabla.
     __tablename__ = "posts"
+    # Índice para recorrer el feed por fecha de creación (paginación keyset)
+    # y para listar los posts de un autor en su panel.
+    __table_args__ = (
+        db.Index('ix_posts_created_id', 'created', 'id'),
+        db.Index('ix_posts_author_created', 'author', 'created'),
+    )
 
     # Colocamos columnas tablas.
     id = db.Column(db.Integer, primary_key=True)
@@ -37,8 +43,23 @@ class Post(db.Model):
     url = db.Column(db.String(100), unique=True, nullable=False)
     title = db.Column(db.String(100), nullable=False)
     info = db.Column(db.Text)
-    content = db.Column(db.Text)
+    # El cuerpo del post (HTML de CKEditor) solo se carga cuando se pide
+    # explícitamente con undefer(), los listados no lo necesitan.
+    content = db.deferred(db.Column(db.Text))
+    # Columnas generadas al guardar (blogr/content.py): HTML limpio que
+    # muestra blog.html, texto plano para la búsqueda y resumen.
+    content_html = db.deferred(db.Column(db.Text))
+    content_text = db.deferred(db.Column(db.Text))
+    excerpt = db.Column(db.String(300))
+    # Versión del procesamiento con la que se generaron (flask content rerender).
+    content_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Última modificación de la página del post (ETag / Last-Modified / caché).
+    updated = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relación con el autor del post. Las vistas de listado la cargan
+    # en lote con selectinload() para evitar una consulta por cada post.
+    author_user = db.relationship('User', lazy='select')
 
     # Creamos el Metodo Constructor
     def __init__(self, author, url, title, info, content) -> None:
@@ -51,3 +72,89 @@ class Post(db.Model):
     # Colocamos como vamos a representar cada uno de estos elementos en el Shell.
     def __repr__(self) -> str:
         return f"Post: {self.title}"
+
+
+# @audit Tabla Jobs
+class Job(db.Model):
+    # Colocamos nombre tabla.
+    __tablename__ = "jobs"
+    # Índice para buscar los trabajos pendientes (flask jobs drain) y los de un usuario.
+    __table_args__ = (
+        db.Index('ix_jobs_status', 'status', 'id'),
+        db.Index('ix_jobs_user_status', 'user_id', 'status'),
+    )
+
+    # Colocamos columnas tabla.
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    payload = db.Column(db.Text)
+    # pending -> running -> done / failed
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Creamos el Metodo Constructor.
+    def __init__(self, kind, user_id=None, payload=None):
+        self.kind = kind
+        self.user_id = user_id
+        self.payload = payload
+        self.status = 'pending'
+        self.attempts = 0
+
+    # Colocamos como vamos a representar cada uno de estos elementos en el Shell.
+    def __repr__(self) -> str:
+        return f"Job: {self.kind} #{self.id} ({self.status})"
+
+
+# @audit Tabla Media
+class Media(db.Model):
+    # Colocamos nombre tabla.
+    __tablename__ = "media"
+
+    # Colocamos columnas tabla.
+    # El archivo se identifica por el SHA-256 de su contenido (sin duplicados).
+    sha256 = db.Column(db.String(64), primary_key=True)
+    # Ruta dentro de static, puede llevar el marcador {size} (ej. avatares).
+    path = db.Column(db.String(200), unique=True, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    # Cantidad de registros que usan el archivo (User.photo), en 0 se puede eliminar.
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    created = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Creamos el Metodo Constructor.
+    def __init__(self, sha256, path, size):
+        self.sha256 = sha256
+        self.path = path
+        self.size = size
+        self.refcount = 0
+
+    # Colocamos como vamos a representar cada uno de estos elementos en el Shell.
+    def __repr__(self) -> str:
+        return f"Media: {self.path} ({self.refcount})"
+
+
+# @audit Tabla RateLimits
+class RateLimit(db.Model):
+    # Colocamos nombre tabla.
+    __tablename__ = "rate_limits"
+
+    # Colocamos columnas tabla.
+    # Cubeta de tokens compartida entre procesos (blogr/ratelimit.py), ej. 'login:ip:10.0.0.1'.
+    key = db.Column(db.String(100), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    # Segundos (epoch) de la última recarga de la cubeta.
+    updated = db.Column(db.Float, nullable=False, index=True)
+
+    # Creamos el Metodo Constructor.
+    def __init__(self, key, tokens, updated):
+        self.key = key
+        self.tokens = tokens
+        self.updated = updated
+
+    # Colocamos como vamos a representar cada uno de estos elementos en el Shell.
+    def __repr__(self) -> str:
+        return f"RateLimit: {self.key} ({self.tokens:.1f})"
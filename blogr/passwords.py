@@ -0,0 +1,213 @@
+"""
+Hash de contraseñas fuera del worker de la solicitud.
+
+generate_password_hash/check_password_hash son lentos a propósito
+(scrypt/pbkdf2), se ejecutan en un pool de procesos para que una ráfaga
+de inicios de sesión no bloquee el render de las páginas:
+    - PASSWORD_POOL_WORKERS procesos calculan los hash.
+    - PASSWORD_MAX_PENDING limita las solicitudes en espera; si no hay
+      lugar en PASSWORD_QUEUE_TIMEOUT segundos se responde 503.
+    - PASSWORD_HASH_METHOD / PASSWORD_SALT_LENGTH definen el hash; al
+      cambiarlos, el hash del usuario se actualiza en su siguiente login.
+
+Con PASSWORD_HASH_MODE = 'sync' se calcula en la misma solicitud.
+
+Los límites son por worker del servidor: cada worker de gunicorn tiene su
+pool y su semáforo, en total hay WEB_CONCURRENCY x PASSWORD_POOL_WORKERS
+procesos de hash (por defecto PASSWORD_POOL_WORKERS reparte los núcleos
+entre los workers, mínimo 1). Los procesos del pool importan el paquete
+blogr (no crean la aplicación).
+
+Con workers sync (un hilo) la solicitud espera el hash igual que antes:
+el pool solo acota la espera (PASSWORD_QUEUE_TIMEOUT, luego 503) y la
+cantidad de hash simultáneos. Con gthread (GUNICORN_THREADS > 1) los
+demás hilos del worker siguen atendiendo solicitudes mientras tanto.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    TimeoutError
+)
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash
+)
+
+
+# @audit Class PasswordBusy
+class PasswordBusy(RuntimeError):
+    """ No hay lugar en el pool de hash en el tiempo de espera. """
+
+
+# * Funciones que se ejecutan en los procesos del pool.
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method, salt_length)
+
+
+def _verify(pwhash, password, method, salt_length):
+    """
+    Revisa la contraseña y, si el hash usa otros parámetros,
+    calcula el nuevo en la misma llamada.
+
+    Returns:
+        tuple: (bool, nuevo hash o None).
+    """
+    if not check_password_hash(pwhash, password):
+        return False, None
+
+    if needs_rehash(pwhash, method, salt_length):
+        return True, generate_password_hash(password, method, salt_length)
+
+    return True, None
+
+
+def normalize_method(method):
+    """
+    Function que escribe el método con todos sus parámetros, como
+    lo guarda Werkzeug: 'scrypt' -> 'scrypt:32768:8:1',
+    'pbkdf2' -> 'pbkdf2:sha256:600000'.
+
+    Returns:
+        tuple: (nombre, parámetros...) comparable entre escrituras equivalentes.
+    """
+    name, *args = method.split(':')
+
+    if name == 'scrypt' and not args:
+        args = [2 ** 15, 8, 1]
+    elif name == 'pbkdf2':
+        args = (args + ['sha256'])[:1] + (args[1:] or [DEFAULT_PBKDF2_ITERATIONS])
+
+    return (name, *(int(arg) if str(arg).isdigit() else arg for arg in args))
+
+
+def needs_rehash(pwhash, method, salt_length):
+    """
+    Indica si el hash se generó con otro método o longitud de salt.
+
+    Args:
+        pwhash (string): Hash guardado ('método$salt$hash').
+        method (string): PASSWORD_HASH_METHOD.
+        salt_length (int): PASSWORD_SALT_LENGTH.
+    """
+    if pwhash.count('$') < 2:
+        return True
+
+    current, salt, _ = pwhash.split('$', 2)
+
+    return normalize_method(current) != normalize_method(method) or len(salt) != salt_length
+
+
+# @audit Class PasswordHasher
+class PasswordHasher():
+    """
+    Pool de procesos acotado para los hash de contraseñas.
+
+    El pool se crea en el primer uso de cada proceso, así funciona con
+    servidores que crean los workers con fork después de create_app().
+    """
+
+    def __init__(self, mode, workers, max_pending, timeout):
+        self.mode = mode
+        self.workers = workers
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None or self.pid != os.getpid():
+                # spawn: el proceso de la aplicación tiene hilos (jobs, servidor).
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self.pid = os.getpid()
+
+            return self.executor
+
+    def run(self, function, *args):
+        if self.mode == 'sync':
+            return function(*args)
+
+        # Un solo plazo para esperar lugar y esperar el resultado.
+        deadline = time.monotonic() + self.timeout
+
+        # Sin lugar en la cola respondemos rápido en lugar de acumular solicitudes.
+        if not self.slots.acquire(timeout=self.timeout):
+            raise PasswordBusy('El pool de contraseñas está ocupado.')
+
+        try:
+            future = self.get_executor().submit(function, *args)
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+
+        except TimeoutError as e:
+            # Nadie espera el resultado: si aún no inicia se elimina de la cola.
+            future.cancel()
+            raise PasswordBusy('Tiempo de espera agotado al calcular el hash.') from e
+
+        except BrokenProcessPool as e:
+            # Un proceso terminó inesperadamente, el siguiente uso crea otro pool.
+            with self.lock:
+                self.executor = None
+            raise PasswordBusy('El pool de contraseñas se reinició.') from e
+
+        finally:
+            self.slots.release()
+
+
+def _settings():
+    config = current_app.config
+    return config['PASSWORD_HASH_METHOD'], config['PASSWORD_SALT_LENGTH']
+
+
+# @audit Function hash_password()
+def hash_password(password):
+    """
+    Function que genera el hash de una contraseña en el pool.
+
+    Args:
+        password (string): Contraseña en texto plano.
+
+    Returns:
+        string: Hash para User.password.
+
+    Raises:
+        PasswordBusy: Si el pool no responde a tiempo.
+    """
+    return current_app.extensions['passwords'].run(_hash, password, *_settings())
+
+
+# @audit Function verify_password()
+def verify_password(pwhash, password):
+    """
+    Function que revisa una contraseña en el pool.
+
+    Args:
+        pwhash (string): Hash guardado (User.password).
+        password (string): Contraseña enviada.
+
+    Returns:
+        tuple: (bool, nuevo hash si cambiaron los parámetros o None).
+
+    Raises:
+        PasswordBusy: Si el pool no responde a tiempo.
+    """
+    return current_app.extensions['passwords'].run(_verify, pwhash, password, *_settings())
+
+
+def init_app(app):
+    """ Crea el pool de hash de contraseñas. """
+    app.extensions['passwords'] = PasswordHasher(
+        app.config['PASSWORD_HASH_MODE'],
+        app.config['PASSWORD_POOL_WORKERS'],
+        app.config['PASSWORD_MAX_PENDING'],
+        app.config['PASSWORD_QUEUE_TIMEOUT']
+    )
@@ -5,10 +5,16 @@ from flask import (
     redirect,
     flash,
     url_for,
-    g
+    g,
+    current_app
 )
 from .auth import login_required
 from .models import Post
+from .search import get_backend
+from .cache import invalidate_pages
+from .content import render_post
+from .upsert import insert_unique
+from .database import read_replica
 from blogr import db
 from flask_wtf import FlaskForm
 from wtforms import (
@@ -18,6 +24,7 @@ from wtforms import (
     validators
 )
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import undefer
 
 
 # Creamos Blueprint /post
@@ -27,14 +34,22 @@ bp = Blueprint('post', __name__, url_prefix='/post')
 # @audit Route /posts
 @bp.route('/posts')
 @login_required  # ! Decorador para requerir la session en esta vista.
+@read_replica
 def posts():
     """
-    Ruta/vista que muestra todos los posts publicados por el usuario.
+    Ruta/vista que muestra los posts publicados por el usuario,
+    del más reciente al más antiguo y paginados.
 
     Returns:
         render_template: Muestra la plantilla (admin/posts.html).
     """
-    posts = Post.query.all()
+    posts = Post.query.filter_by(author=g.user.id) \
+        .order_by(Post.created.desc(), Post.id.desc()) \
+        .paginate(
+            page=request.args.get('page', 1, type=int),
+            per_page=current_app.config['POSTS_PER_PAGE'],
+            error_out=False
+        )
 
     return render_template('admin/posts.html', posts=posts)
 
@@ -62,29 +77,30 @@ def create():
         # Creamos nuevo post incluyendo el id del usuario.
         post = Post(g.user.id, url, title, info, content)
 
+        # Generamos el HTML limpio, el texto y el resumen del post.
+        render_post(post)
+
         error = None
 
-        # Comprobamos url de post con los existentes.
-        post_url = Post.query.filter_by(url=url).first()
+        try:
+            # Insertamos solo si la url no existe (restricción única), en una sola consulta.
+            post.id = insert_unique(post)
 
-        if post_url == None:
-            try:
-                # Guardamos en la base de datos y confirmamos cambios.
-                db.session.add(post)
+            if post.id is not None:
+                # Agregamos el post al índice de búsqueda y confirmamos cambios.
+                get_backend().index_post(post)
                 db.session.commit()
                 flash(f'El blog "{post.title}" se agrego correctamente.')
 
                 return redirect(url_for('post.posts'))
 
-            except SQLAlchemyError as e:
-                # Deshacer cambios en caso de error
-                db.session.rollback()
-                error = f'Error al guardar el post: {str(e)}'
-                flash(error)
-
-        else:
             error = f'La URL "{url}" ya existe. Intenta nuevamente.'
 
+        except SQLAlchemyError as e:
+            # Deshacer cambios en caso de error
+            db.session.rollback()
+            error = f'Error al guardar el post: {str(e)}'
+
         flash(error)
 
     return render_template('admin/create.html')
@@ -107,8 +123,8 @@ def update(id):
         render_template: Nos redirige a udate.html en caso de error.
     """
     try:
-        # Obtenemos todo los datos del post públicado.
-        post = Post.query.get_or_404(id)
+        # Obtenemos todo los datos del post públicado, incluyendo el contenido.
+        post = Post.query.options(undefer(Post.content)).get_or_404(id)
 
     except SQLAlchemyError as e:
         # Deshacer cambios en caso de error
@@ -119,11 +135,15 @@ def update(id):
     if request.method == 'POST':
         post.title = request.form.get('title')
         post.info = request.form.get('info')
-        post.content = request.form.get('content')
+        # CKEditor envía el contenido en el campo "ckeditor".
+        post.content = request.form.get('ckeditor')
+        render_post(post)
 
         try:
-            # Confirmamos los cambios a la base de datos.
+            # Actualizamos el índice de búsqueda y confirmamos los cambios a la base de datos.
+            get_backend().index_post(post)
             db.session.commit()
+            invalidate_pages([post.url])
 
         except SQLAlchemyError as e:
             # Deshacer cambios en caso de error
@@ -185,10 +205,12 @@ def delete(id):
         # Obtenemos todo los datos del post públicado.
         post = Post.query.get_or_404(id)
 
-        # Eliminamos el post.
+        # Eliminamos el post y lo quitamos del índice de búsqueda.
+        get_backend().remove_post(post.id)
         db.session.delete(post)
         # Confirmamos los cambios en al base de datos.
         db.session.commit()
+        invalidate_pages([post.url])
 
         flash(f'Se elimino con exito el blog "{post.title}".')
 
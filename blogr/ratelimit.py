@@ -0,0 +1,227 @@
+"""
+Límite de intentos de inicio de sesión (cubeta de tokens).
+
+Cada dirección IP y cada correo tienen una cubeta con `burst` tokens que
+se recarga a `per_minute` tokens por minuto; cada intento consume uno.
+Sin tokens, auth.login responde 429 antes de consultar la base de datos
+o calcular el hash de la contraseña.
+
+RATELIMIT_BACKEND define dónde se guardan las cubetas:
+    memory: en el proceso (cada worker lleva su cuenta).
+    database: tabla rate_limits, compartida por todos los workers.
+    null: sin límite.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import (
+    delete,
+    insert,
+    select,
+    update
+)
+from sqlalchemy.exc import IntegrityError
+from blogr import db
+from .models import RateLimit
+
+
+def refill(tokens, updated, now, burst, per_minute):
+    """
+    Function que recarga la cubeta según el tiempo transcurrido.
+
+    Returns:
+        float: Tokens disponibles (máximo `burst`).
+    """
+    return min(burst, tokens + (now - updated) * per_minute / 60)
+
+
+def retry_after(tokens, per_minute):
+    """ Segundos hasta que la cubeta tenga un token. """
+    return (1 - tokens) * 60 / per_minute
+
+
+# @audit Class MemoryLimiter
+class MemoryLimiter():
+    """
+    Cubetas en memoria, se eliminan las usadas hace más tiempo
+    al superar `maxsize`.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, burst, per_minute):
+        """
+        Consume un token de la cubeta.
+
+        Returns:
+            float: 0 si se permite el intento, si no los segundos de espera.
+        """
+        now = time.time()
+
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = refill(tokens, updated, now, burst, per_minute)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = retry_after(tokens, per_minute)
+
+            self._buckets[key] = (tokens, now)
+
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+    def clear(self, older_than):
+        with self._lock:
+            for key in [key for key, (_, updated) in self._buckets.items() if updated < older_than]:
+                del self._buckets[key]
+
+
+# @audit Class DatabaseLimiter
+class DatabaseLimiter():
+    """
+    Cubetas en la tabla rate_limits.
+
+    Usa su propia conexión (no la sesión de la solicitud) y un UPDATE
+    condicional sobre `updated`, si otro worker modificó la cubeta al
+    mismo tiempo se vuelve a leer.
+    """
+    table = RateLimit.__table__
+    attempts = 3
+
+    def consume(self, key, burst, per_minute):
+        for _ in range(self.attempts):
+            try:
+                wait = self._consume(key, burst, per_minute)
+            except IntegrityError:
+                # Otro worker creó la cubeta al mismo tiempo, volvemos a leer.
+                continue
+
+            if wait is not None:
+                return wait
+
+        # Demasiada concurrencia sobre la misma cubeta: la tratamos como llena.
+        return retry_after(0, per_minute)
+
+    def _consume(self, key, burst, per_minute):
+        """ Regresa None si la cubeta cambió mientras se leía. """
+        now = time.time()
+
+        with db.engine.begin() as connection:
+            row = connection.execute(
+                select(self.table.c.tokens, self.table.c.updated).where(self.table.c.key == key)
+            ).first()
+
+            tokens = burst if row is None else refill(row.tokens, row.updated, now, burst, per_minute)
+            wait = 0 if tokens >= 1 else retry_after(tokens, per_minute)
+
+            if not wait:
+                tokens -= 1
+
+            if row is None:
+                connection.execute(insert(self.table).values(key=key, tokens=tokens, updated=now))
+                return wait
+
+            changed = connection.execute(
+                update(self.table)
+                .where(self.table.c.key == key, self.table.c.updated == row.updated)
+                .values(tokens=tokens, updated=now)
+            ).rowcount
+
+        return wait if changed else None
+
+    def clear(self, older_than):
+        with db.engine.begin() as connection:
+            connection.execute(delete(self.table).where(self.table.c.updated < older_than))
+
+
+# @audit Class NullLimiter
+class NullLimiter():
+    def consume(self, key, burst, per_minute):
+        return 0
+
+    def clear(self, older_than):
+        pass
+
+
+def email_key(email):
+    """ Clave de la cubeta del correo, sin guardarlo en texto plano. """
+    return hashlib.sha256((email or '').strip().lower().encode()).hexdigest()[:32]
+
+
+# @audit Function check_login()
+def check_login(ip, email):
+    """
+    Function que consume un intento de las cubetas de la IP y del correo.
+
+    Args:
+        ip (string): Dirección del cliente.
+        email (string): Correo enviado en el formulario.
+
+    Returns:
+        tuple: (motivo, segundos de espera) si se rechaza ('ip' o 'email'),
+        (None, 0) si se permite.
+    """
+    limiter = current_app.extensions['ratelimit']
+    config = current_app.config
+
+    wait = limiter.consume(f'login:ip:{ip}', config['LOGIN_LIMIT_IP_BURST'], config['LOGIN_LIMIT_IP_PER_MINUTE'])
+
+    if wait:
+        return 'ip', wait
+
+    wait = limiter.consume(
+        f'login:email:{email_key(email)}',
+        config['LOGIN_LIMIT_EMAIL_BURST'],
+        config['LOGIN_LIMIT_EMAIL_PER_MINUTE']
+    )
+
+    if wait:
+        return 'email', wait
+
+    return None, 0
+
+
+# @audit CLI flask ratelimit
+cli = AppGroup('ratelimit', help='Administración de los límites de intentos.')
+
+
+@cli.command('clear')
+@click.option('--older-than', default=60, show_default=True, help='Minutos sin uso de la cubeta.')
+def clear_command(older_than):
+    """ Elimina las cubetas sin uso (RATELIMIT_BACKEND = 'database'). """
+    current_app.extensions['ratelimit'].clear(time.time() - older_than * 60)
+    click.echo('Cubetas eliminadas.')
+
+
+def init_app(app):
+    """
+    Crea el limitador según RATELIMIT_BACKEND ('memory', 'database' o 'null')
+    y describe sus métricas (llamar después de metrics.init_app).
+    """
+    backend = app.config['RATELIMIT_BACKEND']
+
+    if backend == 'database':
+        limiter = DatabaseLimiter()
+    elif backend == 'null':
+        limiter = NullLimiter()
+    else:
+        limiter = MemoryLimiter(app.config['RATELIMIT_MEMORY_SIZE'])
+
+    app.extensions['ratelimit'] = limiter
+    app.cli.add_command(cli)
+
+    metrics = app.extensions['metrics']
+    metrics.describe('blogr_login_rejected_total', 'Intentos de login rechazados sin verificar la contraseña.')
+    metrics.describe('blogr_login_attempts_total', 'Intentos de login que verificaron la contraseña.')
@@ -0,0 +1,386 @@
+"""
+Motores de búsqueda de posts.
+
+El motor se elige según la base de datos configurada:
+    postgresql: tsvector + índice GIN con resultados ordenados por relevancia.
+    sqlite: tabla virtual FTS5 (posts_fts) sincronizada desde las vistas.
+    trigram: pg_trgm sobre el título, tolera fragmentos y errores de escritura
+        (opcional, índice de `flask search trigram-index`).
+    like: búsqueda por título con ILIKE (sin índice), respaldo para otros motores.
+
+Los índices de postgresql y sqlite se crean con `flask db upgrade`
+(migrations/0006_search.py y 0008_posts_search_vector.py).
+"""
+import click
+from html.parser import HTMLParser
+from flask import current_app
+from flask.cli import AppGroup
+from markupsafe import Markup, escape
+from sqlalchemy import (
+    func,
+    literal,
+    literal_column,
+    text
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import (
+    selectinload,
+    undefer
+)
+from blogr import db
+from .migrate import Operations
+from .models import Post
+
+
+# Marcas de inicio y fin del resaltado, se reemplazan por <mark> después de escapar.
+START_SEL = '\x02'
+STOP_SEL = '\x03'
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+
+# @audit Function strip_html()
+def strip_html(html):
+    """
+    Function que obtiene el texto plano de un HTML.
+
+    Args:
+        html (string): HTML generado por CKEditor.
+
+    Returns:
+        string: Texto sin etiquetas.
+    """
+    parser = _TextExtractor()
+    parser.feed(html or '')
+    parser.close()
+
+    return ' '.join(' '.join(parser.parts).split())
+
+
+def highlight(snippet):
+    """
+    Function que escapa el fragmento encontrado y
+    resalta las coincidencias con <mark>.
+
+    Args:
+        snippet (string): Fragmento con las marcas START_SEL/STOP_SEL.
+
+    Returns:
+        Markup: Fragmento seguro para la plantilla.
+    """
+    if not snippet:
+        return None
+
+    return Markup(
+        str(escape(snippet)).replace(START_SEL, '<mark>').replace(STOP_SEL, '</mark>')
+    )
+
+
+# * Configuración del documento de búsqueda de PostgreSQL.
+LANGUAGE = 'spanish'
+
+
+# Documento de búsqueda ponderado: título (A) > descripción (B) > content_text (C).
+# Columna con índice GIN que un trigger calcula al escribir el post,
+# no en cada búsqueda (migrations/0008_posts_search_vector.py).
+# No está en el modelo Post: solo existe en PostgreSQL.
+SEARCH_VECTOR = literal_column('posts.search_vector', type_=postgresql.TSVECTOR)
+
+
+# @audit Class SearchPage
+class SearchPage():
+    """
+    Página de resultados de búsqueda.
+
+    Attributes:
+        posts (list): Posts encontrados, ordenados por relevancia.
+        snippets (dict): Fragmento resaltado por id de post.
+        page (int): Número de página actual.
+        has_next (bool): Indica si existe una página siguiente.
+    """
+
+    def __init__(self, posts, snippets, page, has_next):
+        self.posts = posts
+        self.snippets = snippets
+        self.page = page
+        self.has_next = has_next
+
+
+# @audit Class SearchBackend
+class SearchBackend():
+    """
+    Motor base. Las subclases implementan _search()
+    y, si lo necesitan, index_post()/remove_post().
+    """
+    name = None
+
+    def search(self, query, page=1, per_page=10):
+        """
+        Busca posts por el texto escrito por el usuario.
+
+        Args:
+            query (string): Texto de búsqueda.
+            page (int): Página solicitada (inicia en 1).
+            per_page (int): Resultados por página.
+
+        Returns:
+            SearchPage: Resultados de la página solicitada.
+        """
+        query = (query or '').strip()
+        page = max(page, 1)
+
+        if not query:
+            return SearchPage([], {}, page, False)
+
+        # Pedimos un resultado extra para saber si existe una página siguiente.
+        rows = self._search(query, per_page + 1, (page - 1) * per_page)
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+
+        ids = [id for id, snippet in rows]
+        posts = {
+            post.id: post for post in
+            Post.query.options(selectinload(Post.author_user))
+            .filter(Post.id.in_(ids)).all()
+        } if ids else {}
+
+        return SearchPage(
+            [posts[id] for id in ids if id in posts],
+            {id: highlight(snippet) for id, snippet in rows},
+            page,
+            has_next
+        )
+
+    def _search(self, query, limit, offset):
+        """
+        Returns:
+            list: Tuplas (post_id, snippet) ordenadas por relevancia.
+        """
+        raise NotImplementedError
+
+    def index_post(self, post):
+        """ Actualiza el índice después de crear o editar un post. """
+
+    def remove_post(self, post_id):
+        """ Elimina un post del índice. """
+
+    def reindex(self):
+        """ Reconstruye el índice completo. Regresa el número de posts indexados. """
+        return 0
+
+
+# @audit Class PostgresSearch
+class PostgresSearch(SearchBackend):
+    name = 'postgresql'
+
+    def _search(self, query, limit, offset):
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{LANGUAGE}'"), query)
+        rank = func.ts_rank_cd(SEARCH_VECTOR, tsquery)
+        snippet = func.ts_headline(
+            literal_column(f"'{LANGUAGE}'"),
+            func.concat_ws(' ', Post.info, Post.content_text),
+            tsquery,
+            f'StartSel="{START_SEL}", StopSel="{STOP_SEL}", MaxFragments=2, MaxWords=25, MinWords=10'
+        )
+
+        # Calculamos el fragmento solo para las filas de la página.
+        ranked = db.session.query(Post.id.label('id'), rank.label('rank')) \
+            .filter(SEARCH_VECTOR.op('@@')(tsquery)) \
+            .order_by(rank.desc(), Post.id.desc()) \
+            .limit(limit).offset(offset).subquery()
+
+        rows = db.session.query(Post.id, snippet) \
+            .join(ranked, ranked.c.id == Post.id) \
+            .order_by(ranked.c.rank.desc(), Post.id.desc()).all()
+
+        return [(id, snippet) for id, snippet in rows]
+
+
+# @audit Class SQLiteSearch
+class SQLiteSearch(SearchBackend):
+    name = 'sqlite'
+
+    def _search(self, query, limit, offset):
+        rows = db.session.execute(text(
+            'SELECT rowid, snippet(posts_fts, -1, :start, :stop, :ellipsis, 16) '
+            'FROM posts_fts WHERE posts_fts MATCH :query '
+            'ORDER BY bm25(posts_fts, 10.0, 5.0, 1.0) LIMIT :limit OFFSET :offset'
+        ), {
+            'start': START_SEL,
+            'stop': STOP_SEL,
+            'ellipsis': '…',
+            'query': self.match_expression(query),
+            'limit': limit,
+            'offset': offset
+        }).all()
+
+        return [(id, snippet) for id, snippet in rows]
+
+    @staticmethod
+    def match_expression(query):
+        """
+        Convierte el texto del usuario en una expresión FTS5 segura:
+        cada palabra entre comillas y la última como prefijo.
+        """
+        terms = ['"{}"'.format(term.replace('"', '""')) for term in query.split()]
+        terms[-1] += '*'
+
+        return ' '.join(terms)
+
+    def index_post(self, post):
+        self.remove_post(post.id)
+        db.session.execute(text(
+            'INSERT INTO posts_fts (rowid, title, info, content) '
+            'VALUES (:id, :title, :info, :content)'
+        ), {
+            'id': post.id,
+            'title': post.title,
+            'info': post.info,
+            'content': post.content_text if post.content_version else strip_html(post.content)
+        })
+
+    def remove_post(self, post_id):
+        db.session.execute(text('DELETE FROM posts_fts WHERE rowid = :id'), {'id': post_id})
+
+    def reindex(self):
+        db.session.execute(text('DELETE FROM posts_fts'))
+
+        total = 0
+
+        for post in Post.query.options(undefer(Post.content_text)).yield_per(500):
+            self.index_post(post)
+            total += 1
+
+        return total
+
+
+# @audit Class TrigramSearch
+class TrigramSearch(SearchBackend):
+    """
+    Búsqueda por similitud de trigramas sobre el título (pg_trgm).
+
+    Tanto el ILIKE '%texto%' como el operador <% (word_similarity)
+    utilizan el índice GIN ix_posts_title_trgm, por lo que la consulta
+    no recorre toda la tabla. Los resultados se ordenan por similitud.
+    """
+    name = 'trigram'
+
+    def _search(self, query, limit, offset):
+        similarity = func.greatest(
+            func.similarity(Post.title, query),
+            func.word_similarity(query, Post.title)
+        )
+
+        rows = db.session.query(Post.id, Post.info) \
+            .filter(
+                Post.title.icontains(query, autoescape=True) |
+                literal(query).op('<%')(Post.title)
+            ) \
+            .order_by(similarity.desc(), Post.created.desc()) \
+            .limit(limit).offset(offset).all()
+
+        return [(id, info) for id, info in rows]
+
+
+# @audit Class LikeSearch
+class LikeSearch(SearchBackend):
+    name = 'like'
+
+    def _search(self, query, limit, offset):
+        rows = db.session.query(Post.id, Post.info) \
+            .filter(Post.title.ilike(f'%{query}%')) \
+            .order_by(Post.created.desc(), Post.id.desc()) \
+            .limit(limit).offset(offset).all()
+
+        return [(id, info) for id, info in rows]
+
+
+BACKENDS = {
+    backend.name: backend for backend in (PostgresSearch, TrigramSearch, SQLiteSearch, LikeSearch)
+}
+
+
+def get_backend():
+    """
+    Function que obtiene el motor de búsqueda de la aplicación.
+
+    Returns:
+        SearchBackend: Motor configurado en init_app().
+    """
+    return current_app.extensions['search']
+
+
+# @audit Function create_trigram_index()
+def create_trigram_index(op):
+    """
+    Function que crea la extensión pg_trgm y el índice ix_posts_title_trgm
+    (migrations/0009_posts_title_trgm.py y `flask search trigram-index`).
+
+    Args:
+        op (Operations): Operaciones de blogr/migrate.py, sin transacción.
+
+    Returns:
+        bool: False si el servidor no tiene la extensión (paquete contrib).
+    """
+    available = op.execute(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    ).first()
+
+    if not available:
+        return False
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_posts_title_trgm', 'posts', 'title gin_trgm_ops', using='gin')
+
+    return True
+
+
+# @audit CLI flask search
+cli = AppGroup('search', help='Administración del índice de búsqueda.')
+
+
+@cli.command('reindex')
+def reindex_command():
+    """ Reconstruye el índice de búsqueda con todos los posts. """
+    total = get_backend().reindex()
+    db.session.commit()
+    click.echo(f'{total} posts indexados.')
+
+
+@cli.command('trigram-index')
+def trigram_index_command():
+    """ Crea el índice de trigramas de SEARCH_BACKEND = 'trigram' (PostgreSQL). """
+    if db.engine.dialect.name != 'postgresql':
+        raise click.ClickException('El índice de trigramas requiere PostgreSQL.')
+
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción.
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if not create_trigram_index(Operations(connection, False, click.echo)):
+            raise click.ClickException('La extensión pg_trgm no está disponible en el servidor.')
+
+    click.echo('Índice ix_posts_title_trgm creado.')
+
+
+def init_app(app):
+    """
+    Selecciona el motor de búsqueda y registra el CLI.
+
+    Se puede forzar el motor con SEARCH_BACKEND
+    ('postgresql', 'trigram', 'sqlite' o 'like'), por defecto se
+    elige según SQLALCHEMY_DATABASE_URI.
+    """
+    name = app.config.get('SEARCH_BACKEND', 'auto')
+
+    if name == 'auto':
+        name = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+
+    app.extensions['search'] = BACKENDS.get(name, LikeSearch)()
+    app.cli.add_command(cli)
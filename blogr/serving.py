@@ -0,0 +1,176 @@
+"""
+Envío de los archivos de static.
+
+STATIC_SERVE_MODE define quién envía los bytes:
+    flask: la aplicación con send_file; gunicorn usa wsgi.file_wrapper
+        (sendfile, sin copiar el archivo a Python). Soporta Range.
+    x-sendfile: encabezado X-Sendfile (Apache mod_xsendfile, lighttpd).
+    x-accel: encabezado X-Accel-Redirect, nginx envía el archivo desde
+        la ubicación interna STATIC_ACCEL_PREFIX.
+
+Con `flask static nginx-config` se genera la configuración de nginx
+para servir /static directamente, así las solicitudes de archivos
+ni siquiera llegan a los workers de Python.
+
+Los archivos cuyo nombre depende del contenido (static/dist de
+`flask assets build` y el almacén static/media/<aa>/<bb>/<sha256>)
+se envían con Cache-Control immutable de un año.
+"""
+import mimetypes
+import os
+import re
+import click
+from flask import (
+    abort,
+    current_app,
+    send_from_directory
+)
+from flask.cli import AppGroup
+from werkzeug.security import safe_join
+from .assets import (
+    has_precompressed,
+    precompressed
+)
+
+
+# Archivos con el hash del contenido en el nombre, su url nunca cambia.
+IMMUTABLE_PATTERN = re.compile(r'^(dist/|media/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}[-.])')
+
+# Un año, el máximo recomendado para Cache-Control.
+IMMUTABLE_MAX_AGE = 31536000
+
+
+def is_immutable(filename):
+    """
+    Indica si la url del archivo depende de su contenido.
+    """
+    return IMMUTABLE_PATTERN.match(filename) is not None
+
+
+def set_immutable(response):
+    """
+    Agrega Cache-Control immutable de un año a la respuesta.
+    """
+    if response.status_code in (200, 206, 304):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+
+    return response
+
+
+def send_static(filename):
+    """
+    Vista static de la aplicación.
+
+    Args:
+        filename (string): Archivo dentro de static.
+
+    Returns:
+        Response: Archivo (o encabezado para el servidor web) con su caché.
+    """
+    static = current_app.static_folder
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    if current_app.config['STATIC_SERVE_MODE'] == 'x-accel':
+        path = safe_join(static, filename)
+
+        if path is None or not os.path.isfile(path):
+            abort(404)
+
+        # nginx envía el archivo (y elige .gz/.br con gzip_static/brotli_static).
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = current_app.config['STATIC_ACCEL_PREFIX'] + filename
+
+    else:
+        variant, encoding = precompressed(filename)
+
+        response = send_from_directory(
+            static,
+            variant or filename,
+            mimetype=mimetype,
+            max_age=current_app.get_send_file_max_age(filename)
+        )
+
+        if encoding:
+            response.content_encoding = encoding
+
+    # También sin comprimir: una caché compartida no debe enviar esta copia a todos.
+    if has_precompressed(filename):
+        response.vary.add('Accept-Encoding')
+
+    if is_immutable(filename):
+        set_immutable(response)
+
+    return response
+
+
+NGINX_CONFIG = """\
+# Generado con `flask static nginx-config`.
+# Incluir dentro del bloque server {{ ... }}.
+
+# Proxy a gunicorn. La aplicación debe iniciar con TRUSTED_PROXIES=1 (un
+# proxy): toma la IP del cliente de X-Forwarded-For para el límite de
+# intentos de login y METRICS_ALLOW; sin él todos los clientes tienen la IP
+# de nginx. No usar TRUSTED_PROXIES sin proxy: el cliente podría falsificar su IP.
+location / {{
+    proxy_pass http://{upstream};
+    proxy_set_header Host $host;
+    proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+    proxy_set_header X-Forwarded-Proto $scheme;
+}}
+
+# Archivos estáticos servidos directamente por nginx.
+location {url_path}/ {{
+    alias {static}/;
+    gzip_static on;
+    # brotli_static on;  # Requiere el módulo ngx_brotli.
+    expires {expires};
+
+    # Nombre con el hash del contenido: caché de un año.
+    location ~ ^{url_path}/(dist/|media/[0-9a-f]{{2}}/[0-9a-f]{{2}}/[0-9a-f]{{64}}[-.]) {{
+        gzip_static on;
+        expires max;
+        add_header Cache-Control "public, max-age={immutable}, immutable";
+    }}
+}}
+
+# Ubicación interna para STATIC_SERVE_MODE = 'x-accel'.
+location {accel_prefix} {{
+    internal;
+    alias {static}/;
+    gzip_static on;
+}}
+"""
+
+
+# @audit CLI flask static
+cli = AppGroup('static', help='Envío de archivos estáticos.')
+
+
+@cli.command('nginx-config')
+def nginx_config_command():
+    """ Muestra la configuración de nginx para servir /static. """
+    click.echo(NGINX_CONFIG.format(
+        url_path=current_app.static_url_path,
+        static=os.path.abspath(current_app.static_folder),
+        # Igual que Flask: sin SEND_FILE_MAX_AGE_DEFAULT se revalida (no-cache).
+        expires=f'{max_age}s' if (max_age := current_app.config['SEND_FILE_MAX_AGE_DEFAULT']) else 'epoch',
+        immutable=IMMUTABLE_MAX_AGE,
+        accel_prefix=current_app.config['STATIC_ACCEL_PREFIX'],
+        upstream=os.environ.get('GUNICORN_BIND', '127.0.0.1:8000').replace('0.0.0.0', '127.0.0.1')
+    ))
+
+
+def init_app(app):
+    """
+    Registra la vista static y el CLI.
+    """
+    if app.config['STATIC_SERVE_MODE'] == 'x-sendfile':
+        app.config['USE_X_SENDFILE'] = True
+
+    if app.has_static_folder:
+        app.view_functions['static'] = send_static
+
+    app.cli.add_command(cli)
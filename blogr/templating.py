@@ -0,0 +1,93 @@
+"""
+Caché de bytecode y precompilación de las plantillas de Jinja.
+
+Con TEMPLATES_BYTECODE_CACHE las plantillas compiladas se guardan en
+TEMPLATES_BYTECODE_CACHE_DIR (por defecto instance/jinja_cache): un
+worker nuevo las carga del disco en lugar de compilarlas en su primera
+solicitud. La llave de cada archivo incluye el checksum de la plantilla,
+al editarla se vuelve a compilar (no hay que limpiar la caché).
+
+`flask templates compile` compila todas las plantillas al desplegar.
+Con TEMPLATES_PRELOAD (ProductionConfig) create_app las carga en la
+caché en memoria de Jinja; con gunicorn preload_app los workers las
+heredan ya cargadas.
+"""
+import os
+import shutil
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from jinja2 import (
+    FileSystemBytecodeCache,
+    TemplateSyntaxError
+)
+
+
+def cache_directory(app):
+    return app.config['TEMPLATES_BYTECODE_CACHE_DIR'] or os.path.join(app.instance_path, 'jinja_cache')
+
+
+# @audit Function compile_templates()
+def compile_templates(app):
+    """
+    Function que compila todas las plantillas (blogr/templates y las
+    de los Blueprints, ej. CKEditor) y las guarda en la caché de Jinja.
+
+    Returns:
+        list: Nombres de las plantillas compiladas.
+
+    Raises:
+        TemplateSyntaxError: Si una plantilla tiene errores.
+    """
+    names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+
+    for name in names:
+        app.jinja_env.get_template(name)
+
+    return names
+
+
+# @audit CLI flask templates
+cli = AppGroup('templates', help='Compilación de las plantillas de Jinja.')
+
+
+@cli.command('compile')
+def compile_command():
+    """ Compila las plantillas en la caché de bytecode (TEMPLATES_BYTECODE_CACHE_DIR). """
+    if current_app.jinja_env.bytecode_cache is None:
+        raise click.ClickException('TEMPLATES_BYTECODE_CACHE está desactivado.')
+
+    start = time.perf_counter()
+
+    try:
+        names = compile_templates(current_app)
+    except TemplateSyntaxError as e:
+        raise click.ClickException(f'{e.filename or e.name}:{e.lineno}: {e.message}')
+
+    click.echo(
+        f'{len(names)} plantillas compiladas en {cache_directory(current_app)} '
+        f'({(time.perf_counter() - start) * 1000:.0f} ms).'
+    )
+
+
+@cli.command('clean')
+def clean_command():
+    """ Elimina la caché de bytecode. """
+    shutil.rmtree(cache_directory(current_app), ignore_errors=True)
+    click.echo('Caché de plantillas eliminada.')
+
+
+def init_app(app):
+    """
+    Configura la caché de bytecode de app.jinja_env y registra el CLI.
+    """
+    app.cli.add_command(cli)
+
+    if not app.config['TEMPLATES_BYTECODE_CACHE']:
+        return
+
+    directory = cache_directory(app)
+    os.makedirs(directory, exist_ok=True)
+
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
@@ -0,0 +1,68 @@
+"""
+Inserción que respeta las restricciones únicas en una sola consulta.
+
+En lugar de buscar el registro y después insertarlo (dos consultas y
+una condición de carrera entre solicitudes), se inserta con
+INSERT ... ON CONFLICT DO NOTHING RETURNING id: si ya existe un registro
+con el mismo valor único no se devuelve ninguna fila.
+"""
+from sqlalchemy import (
+    inspect,
+    insert
+)
+from sqlalchemy.dialects import (
+    postgresql,
+    sqlite
+)
+from sqlalchemy.exc import IntegrityError
+from blogr import db
+
+
+# Motores con ON CONFLICT DO NOTHING y RETURNING.
+DIALECT_INSERT = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert
+}
+
+
+# @audit Function insert_unique()
+def insert_unique(instance):
+    """
+    Function que inserta un registro nuevo si no viola ninguna
+    restricción única, en la transacción de la sesión.
+
+    Args:
+        instance (db.Model): Registro sin guardar (no se agrega a la sesión).
+
+    Returns:
+        int: Llave primaria del registro insertado o None si ya existía.
+    """
+    mapper = inspect(type(instance))
+    table = mapper.local_table
+    values = {}
+
+    for attribute in mapper.column_attrs:
+        value = getattr(instance, attribute.key)
+
+        # Las columnas sin valor usan su default (created, updated...).
+        if value is not None:
+            values[attribute.columns[0].name] = value
+
+    primary_key = table.primary_key.columns.values()[0]
+    dialect = db.session.get_bind(mapper).dialect.name
+
+    if dialect in DIALECT_INSERT:
+        statement = DIALECT_INSERT[dialect](table).values(values) \
+            .on_conflict_do_nothing() \
+            .returning(primary_key)
+
+        return db.session.execute(statement).scalar()
+
+    # Otros motores: insertamos dentro de un savepoint y tomamos el error.
+    try:
+        with db.session.begin_nested():
+            result = db.session.execute(insert(table).values(values))
+    except IntegrityError:
+        return None
+
+    return result.inserted_primary_key[0]
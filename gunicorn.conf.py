@@ -0,0 +1,74 @@
+"""
+Configuración de gunicorn (`gunicorn wsgi:app`).
+
+Presets por variable de entorno:
+    WEB_CONCURRENCY: procesos, por defecto 2 x núcleos + 1.
+    GUNICORN_THREADS: hilos por proceso (worker gthread si es mayor que 1).
+        Las vistas esperan a la base de datos, 2-4 hilos por proceso
+        aprovechan esa espera; cada hilo usa una conexión del pool,
+        DB_POOL_SIZE + DB_MAX_OVERFLOW debe ser al menos GUNICORN_THREADS.
+    GUNICORN_TIMEOUT / GUNICORN_GRACEFUL_TIMEOUT: segundos.
+    GUNICORN_MAX_REQUESTS: reinicia el worker después de N solicitudes, 0 nunca.
+
+preload_app importa la aplicación una sola vez en el proceso principal y
+los workers la comparten al hacer fork (copy-on-write). Los pools de la
+base de datos se descartan en post_fork: una conexión no se comparte
+entre procesos.
+
+Al desplegar, antes de iniciar: `flask db upgrade` y `flask templates compile`
+(ver blogr/templating.py).
+
+Reinicio sin cortar solicitudes: `kill -HUP <pid>` vuelve a leer la
+configuración y crea workers nuevos (con preload_app el código no se
+vuelve a importar, en ese caso usar `kill -USR2 <pid>` y después
+`kill -TERM <pid anterior>`). Los workers terminan sus solicitudes
+durante graceful_timeout.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# La aplicación reparte los núcleos del pool de contraseñas entre los workers (config.py).
+os.environ['WEB_CONCURRENCY'] = str(workers)
+# Los workers suman sus métricas en esta carpeta (blogr/metrics.py).
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'blogr-metrics'))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Evita que todos los workers se reinicien al mismo tiempo.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')  # '-' para stdout
+errorlog = '-'
+
+
+def on_starting(server):
+    """
+    Vacía METRICS_DIR: los contadores empiezan en cero con el servidor
+    (los archivos de los workers reiniciados sí se conservan mientras corre).
+    """
+    shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['METRICS_DIR'])
+
+
+def post_fork(server, worker):
+    """
+    Descarta las conexiones heredadas del proceso principal (preload_app),
+    sin cerrarlas: siguen siendo del proceso principal.
+    """
+    if not preload_app:
+        return
+
+    from wsgi import app
+    from blogr import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
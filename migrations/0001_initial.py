@@ -0,0 +1,47 @@
+"""
+Tablas iniciales: users y posts.
+
+Las bases de datos creadas antes con db.create_all() ya las tienen,
+solo se crean si no existen.
+"""
+from datetime import datetime
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text
+)
+
+
+metadata = MetaData()
+
+users = Table(
+    'users',
+    metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(50), nullable=False),
+    Column('email', String(120), unique=True, nullable=False),
+    Column('password', Text, nullable=False),
+    Column('photo', String(200))
+)
+
+posts = Table(
+    'posts',
+    metadata,
+    Column('id', Integer, primary_key=True),
+    Column('author', Integer, ForeignKey('users.id'), nullable=False),
+    Column('url', String(100), unique=True, nullable=False),
+    Column('title', String(100), nullable=False),
+    Column('info', Text),
+    Column('content', Text),
+    Column('created', DateTime, nullable=False, default=datetime.utcnow)
+)
+
+
+def upgrade(op):
+    op.create_table(users)
+    op.create_table(posts)
@@ -0,0 +1,18 @@
+"""
+posts.updated: última modificación de la página del post
+(ETag / Last-Modified / caché de páginas).
+"""
+
+
+def upgrade(op):
+    if op.has_column('posts', 'updated'):
+        return
+
+    if op.dialect == 'sqlite':
+        # SQLite no permite ALTER COLUMN, la columna NOT NULL necesita un default.
+        op.execute("ALTER TABLE posts ADD COLUMN updated DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00.000000'")
+        op.execute('UPDATE posts SET updated = created')
+    else:
+        op.execute('ALTER TABLE posts ADD COLUMN updated TIMESTAMP')
+        op.execute('UPDATE posts SET updated = created')
+        op.execute('ALTER TABLE posts ALTER COLUMN updated SET NOT NULL')
@@ -0,0 +1,11 @@
+"""
+Índices del feed (paginación keyset por fecha) y del panel del autor.
+
+Sin transacción: en PostgreSQL se crean con CREATE INDEX CONCURRENTLY.
+"""
+TRANSACTIONAL = False
+
+
+def upgrade(op):
+    op.create_index('ix_posts_created_id', 'posts', 'created, id')
+    op.create_index('ix_posts_author_created', 'posts', 'author, created')
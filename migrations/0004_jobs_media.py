@@ -0,0 +1,54 @@
+"""
+Tablas jobs (trabajos en segundo plano) y media (almacén de archivos
+subidos direccionado por contenido).
+"""
+from datetime import datetime
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text
+)
+
+
+metadata = MetaData()
+
+# Referencia para la llave foránea de jobs.user_id.
+Table('users', metadata, Column('id', Integer, primary_key=True))
+
+jobs = Table(
+    'jobs',
+    metadata,
+    Column('id', Integer, primary_key=True),
+    Column('kind', String(50), nullable=False),
+    Column('user_id', Integer, ForeignKey('users.id')),
+    Column('payload', Text),
+    Column('status', String(20), nullable=False, default='pending'),
+    Column('attempts', Integer, nullable=False, default=0),
+    Column('error', Text),
+    Column('created', DateTime, nullable=False, default=datetime.utcnow),
+    Column('updated', DateTime, nullable=False, default=datetime.utcnow),
+    Index('ix_jobs_status', 'status', 'id'),
+    Index('ix_jobs_user_status', 'user_id', 'status')
+)
+
+media = Table(
+    'media',
+    metadata,
+    Column('sha256', String(64), primary_key=True),
+    Column('path', String(200), unique=True, nullable=False),
+    Column('size', Integer, nullable=False),
+    Column('refcount', Integer, nullable=False, default=0),
+    Column('created', DateTime, nullable=False, default=datetime.utcnow),
+    Column('updated', DateTime, nullable=False, default=datetime.utcnow)
+)
+
+
+def upgrade(op):
+    op.create_table(jobs)
+    op.create_table(media)
@@ -0,0 +1,13 @@
+"""
+Columnas generadas al guardar el post (blogr/content.py).
+
+Los posts existentes quedan con content_version = 0, después de migrar
+se procesan con `flask content rerender`.
+"""
+
+
+def upgrade(op):
+    op.add_column('posts', 'content_html', 'TEXT')
+    op.add_column('posts', 'content_text', 'TEXT')
+    op.add_column('posts', 'excerpt', 'VARCHAR(300)')
+    op.add_column('posts', 'content_version', 'INTEGER NOT NULL DEFAULT 0')
@@ -0,0 +1,30 @@
+"""
+Índices de búsqueda (blogr/search.py).
+
+    postgresql: índice GIN sobre el documento de búsqueda (reemplazado
+        por la columna posts.search_vector en 0008_posts_search_vector.py).
+    sqlite: tabla virtual FTS5 posts_fts con el rowid igual al id del post.
+
+El índice de trigramas (SEARCH_BACKEND = 'trigram') es opcional,
+ver 0009_posts_title_trgm.py.
+"""
+TRANSACTIONAL = False
+
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('spanish', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(info, '')), 'B') || "
+    "setweight(to_tsvector('spanish', regexp_replace(coalesce(content, ''), '<[^>]+>', ' ', 'g')), 'C')"
+)
+
+
+def upgrade(op):
+    if op.dialect == 'postgresql':
+        op.create_index('ix_posts_search', 'posts', f'({SEARCH_DOCUMENT})', using='gin')
+
+    elif op.dialect == 'sqlite' and not op.has_table('posts_fts'):
+        op.execute(
+            "CREATE VIRTUAL TABLE posts_fts USING fts5("
+            "title, info, content, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        # El contenido de los posts existentes se indexa con `flask search reindex`.
+        op.execute('INSERT INTO posts_fts (rowid, title, info, content) SELECT id, title, info, content_text FROM posts')
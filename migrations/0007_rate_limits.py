@@ -0,0 +1,25 @@
+"""
+Tabla rate_limits: cubetas de tokens compartidas (RATELIMIT_BACKEND = 'database').
+"""
+from sqlalchemy import (
+    Column,
+    Float,
+    MetaData,
+    String,
+    Table
+)
+
+
+metadata = MetaData()
+
+rate_limits = Table(
+    'rate_limits',
+    metadata,
+    Column('key', String(100), primary_key=True),
+    Column('tokens', Float, nullable=False),
+    Column('updated', Float, nullable=False, index=True)
+)
+
+
+def upgrade(op):
+    op.create_table(rate_limits)
@@ -0,0 +1,49 @@
+"""
+Documento de búsqueda de PostgreSQL en la columna posts.search_vector.
+
+Un trigger BEFORE INSERT OR UPDATE calcula la columna al escribir el post
+(las columnas GENERATED requieren PostgreSQL 12, el trigger funciona
+desde la versión 11). La búsqueda filtra (@@) y ordena (ts_rank_cd) sobre
+la columna en lugar de volver a procesar el contenido en cada fila
+encontrada. Reemplaza el índice de expresión ix_posts_search de 0006_search.py.
+
+El contenido se toma de content_text (texto plano con las entidades
+HTML ya decodificadas, blogr/content.py): CKEditor guarda "canción" como
+"canci&oacute;n" en content. Los posts sin content_text se indexan al
+ejecutar `flask content rerender`.
+"""
+TRANSACTIONAL = False
+
+# Título (A) > descripción (B) > contenido en texto plano (C), ver search.SEARCH_VECTOR.
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('spanish', coalesce({row}title, '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce({row}info, '')), 'B') || "
+    "setweight(to_tsvector('spanish', coalesce({row}content_text, '')), 'C')"
+)
+
+
+def upgrade(op):
+    if op.dialect != 'postgresql':
+        return
+
+    op.add_column('posts', 'search_vector', 'tsvector')
+
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION posts_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_DOCUMENT.format(row='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute('DROP TRIGGER IF EXISTS posts_search_vector ON posts')
+    op.execute(
+        'CREATE TRIGGER posts_search_vector BEFORE INSERT OR UPDATE ON posts '
+        'FOR EACH ROW EXECUTE PROCEDURE posts_search_vector_update()'
+    )
+
+    # Posts existentes.
+    op.execute(f"UPDATE posts SET search_vector = {SEARCH_DOCUMENT.format(row='')}")
+
+    op.create_index('ix_posts_search_vector', 'posts', 'search_vector', using='gin')
+    op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_posts_search')
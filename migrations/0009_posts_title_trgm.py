@@ -0,0 +1,26 @@
+"""
+Índice de trigramas sobre el título (SEARCH_BACKEND = 'trigram').
+
+Sin este índice el operador <% y el ILIKE de TrigramSearch recorren toda
+la tabla posts. Es opcional: solo se crea si SEARCH_BACKEND = 'trigram'
+y el servidor tiene la extensión pg_trgm; en otro caso se omite con un
+mensaje y se puede crear después con `flask search trigram-index`.
+CREATE EXTENSION requiere permisos sobre la base de datos (dueño o
+superusuario).
+"""
+from flask import current_app
+from blogr.search import create_trigram_index
+
+TRANSACTIONAL = False
+
+
+def upgrade(op):
+    if op.dialect != 'postgresql':
+        return
+
+    if current_app.config['SEARCH_BACKEND'] != 'trigram':
+        op.echo('  Índice de trigramas omitido (SEARCH_BACKEND no es "trigram"), ver `flask search trigram-index`.')
+        return
+
+    if not create_trigram_index(op):
+        op.echo('  Índice de trigramas omitido: la extensión pg_trgm no está disponible.')
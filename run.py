@@ -1,5 +1,7 @@
 from blogr import create_app
 
+# Servidor de desarrollo (un proceso, con debugger).
+# En producción: gunicorn wsgi:app (ver gunicorn.conf.py) o uvicorn asgi:app.
 if __name__ == '__main__':
     app = create_app()
-    app.run()
\ No newline at end of file
+    app.run()
@@ -0,0 +1,17 @@
+"""
+Punto de entrada WSGI de producción.
+
+    SECRET_KEY=... gunicorn wsgi:app
+
+Usa ProductionConfig salvo que BLOGR_ENV indique otro entorno.
+
+Los workers, hilos, preload y reinicio se configuran en gunicorn.conf.py
+(se carga automáticamente desde el directorio actual).
+"""
+import os
+from blogr import create_app
+
+
+os.environ.setdefault('BLOGR_ENV', 'production')
+
+app = create_app()